@@ -0,0 +1,4 @@
+from common.chart_cache import ChartCache
+
+# Rendered GitHub charts, one file per user, chart and data version
+github_charts = ChartCache("Github/output/Graphics")
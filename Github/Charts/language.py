@@ -1,35 +1,34 @@
-import json
-import os
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import numpy as np
-
-def generate_language_pie_chart(username):
-    data_path = f"Github/data/{username}.json"
-    output_dir = "Github/output/Graphics"
-    os.makedirs(output_dir, exist_ok=True)
-
-    with open(data_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    language_totals = {}
-    for repo in data.get("repos", []):
-        for lang, bytes_of_code in repo.get("all_languages", {}).items():
-            language_totals[lang] = language_totals.get(lang, 0) + bytes_of_code
-
-    if not language_totals:
-        print("⚠️ No language data found.")
-        return
-
-    sorted_langs = dict(sorted(language_totals.items(), key=lambda item: item[1], reverse=True))
-    labels = list(sorted_langs.keys())
-    sizes = list(sorted_langs.values())
+import io
+from common.chart_cache import ChartSpec
+from Github.dataset import github_store
+from Github.Charts.cache import github_charts
+
+def language_totals(username, dataset=None):
+    if dataset is not None:
+        repos = dataset.repos or []
+    else:
+        repos = github_store.load_rows(username, "repos", ["all_languages"])
+
+    totals = {}
+    for repo in repos:
+        for lang, bytes_of_code in (repo.get("all_languages") or {}).items():
+            totals[lang] = totals.get(lang, 0) + bytes_of_code
+    return totals
+
+def render_language_chart(data):
+    """Draws the language pie for {"username", "labels", "sizes"} (sizes largest first)."""
+    import numpy as np
+    from matplotlib.figure import Figure
+
+    username = data["username"]
+    labels = data["labels"]
+    sizes = data["sizes"]
 
     total = sum(sizes)
     explode = [0.1 if (100 * size / total) < 5 else 0 for size in sizes]
 
-    fig, ax = plt.subplots(figsize=(9, 9))
+    fig = Figure(figsize=(9, 9))
+    ax = fig.subplots()
     wedges, _ = ax.pie(
         sizes,
         startangle=90,
@@ -86,7 +85,7 @@ def generate_language_pie_chart(username):
             )
 
     ax.axis("equal")
-    plt.title(f"{username}'s Language Usage", fontsize=14)
+    ax.set_title(f"{username}'s Language Usage", fontsize=14)
 
     ax.legend(
         wedges,
@@ -97,12 +96,35 @@ def generate_language_pie_chart(username):
         fontsize=10
     )
 
-    plt.tight_layout()
-    chart_path = os.path.join(output_dir, f"{username}_language_chart.png")
-    plt.savefig(chart_path, bbox_inches="tight")
-    plt.close()
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+def language_chart_spec(username, dataset=None):
+    totals = language_totals(username, dataset)
+    if not totals:
+        return None
+
+    sorted_langs = dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+    return ChartSpec(username, "language", {
+        "username": username,
+        "labels": list(sorted_langs.keys()),
+        "sizes": list(sorted_langs.values())
+    })
+
+def generate_language_pie_chart(username, dataset=None):
+    spec = language_chart_spec(username, dataset)
+    if spec is None:
+        print("⚠️ No language data found.")
+        return
 
+    chart_path = github_charts.get_or_render(spec)
+    if chart_path is None:
+        print("❌ Could not save the language pie chart.")
+        return
     print(f"✅ Language pie chart saved to {chart_path}")
+    return chart_path
 
 # if __name__ == "__main__":
 #     generate_language_pie_chart("YOUR_GITHUB_USERNAME")
\ No newline at end of file
@@ -1,34 +1,23 @@
-import os
 import json
 from datetime import datetime
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from common.chart_cache import ChartSpec
+from Github.dataset import github_store
+from Github.Charts.cache import github_charts
 
-def generate_monthly_chart(username):
+def render_monthly_chart(data):
     """
-    Generates an HTML file showing monthly contributions with:
+    Builds an HTML page showing monthly contributions with:
       - Initial view = last 8 months (if available)
       - Rangeslider always showing the full timeline
       - Scrollable/pannable chart with Y-axis auto-scaling
+    and returns it as bytes.
     """
-    # Paths
-    filepath = f"Github/data/{username}.json"
-    output_dir = "Github/output/Graphics"
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, f"{username}_monthly_contribution_chart.html")
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
 
-    # Load JSON
-    with open(filepath, "r", encoding="utf-8") as f:
-        user_data = json.load(f)
-
-    monthly_contributions = user_data.get("monthly_contributions", {})
-    if not monthly_contributions:
-        return None
-
-    # Ensure chronological order
-    items = sorted(monthly_contributions.items(), key=lambda kv: kv[0])  # YYYY-MM sort works
-    months = [datetime.strptime(k, "%Y-%m") for k, _ in items]
-    counts = [v for _, v in items]
+    username = data["username"]
+    months = [datetime.strptime(k, "%Y-%m") for k in data["months"]]
+    counts = data["counts"]
 
     # Create plot
     fig = make_subplots(rows=1, cols=1)
@@ -63,6 +52,48 @@ def generate_monthly_chart(username):
     if len(months) > 8:
         fig.update_xaxes(range=[months[-8], months[-1]])
 
-    # Save HTML
-    fig.write_html(output_path, include_plotlyjs="cdn")
-    return output_path
\ No newline at end of file
+    return fig.to_html(include_plotlyjs="cdn").encode("utf-8")
+
+def render_monthly_payload(data):
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+def monthly_series(username, dataset=None):
+    # Only the monthly series is read from the stored dataset
+    user_data = dataset or github_store.load(username, ["monthly_contributions"])
+
+    monthly_contributions = user_data.get("monthly_contributions", {})
+    if not monthly_contributions:
+        return None
+
+    # Ensure chronological order
+    items = sorted(monthly_contributions.items(), key=lambda kv: kv[0])  # YYYY-MM sort works
+    return {
+        "username": username,
+        "months": [k for k, _ in items],
+        "counts": [v for _, v in items]
+    }
+
+def monthly_chart_spec(username, dataset=None):
+    data = monthly_series(username, dataset)
+    if data is None:
+        return None
+    return ChartSpec(username, "monthly", data, ext="html", mimetype="text/html", render=render_monthly_chart)
+
+def monthly_payload_spec(username, dataset=None):
+    """
+    The series alone as compact JSON, for pages that plot it client-side.
+    """
+    data = monthly_series(username, dataset)
+    if data is None:
+        return None
+    return ChartSpec(username, "monthly_series", data, ext="json", mimetype="application/json", render=render_monthly_payload)
+
+def generate_monthly_chart(username, dataset=None):
+    """
+    Returns the path of the monthly contributions HTML chart, building it
+    only when the monthly series changed. None if there is no data.
+    """
+    spec = monthly_chart_spec(username, dataset)
+    if spec is None:
+        return None
+    return github_charts.get_or_render(spec)
@@ -0,0 +1,100 @@
+import io
+import os
+from common.chart_cache import ChartSpec
+from common.config import load_env
+from Github.dataset import github_store
+from Github.Charts.cache import github_charts
+
+load_env()
+
+# Repositories shown on the chart
+REPO_STARS_TOP_N = int(os.getenv("GITHUB_REPO_STARS_TOP_N", "10"))
+
+def top_repos(repos, top_n=REPO_STARS_TOP_N):
+    """
+    The `top_n` repos by stars (forks break ties, then stored order), most
+    starred first. A linear-time partition finds the cut-off score, so only
+    the selected few are sorted however many repos the user has.
+    """
+    import numpy as np
+
+    if not repos:
+        return []
+    stars = np.fromiter((repo.get("stars") or 0 for repo in repos), dtype=np.int64, count=len(repos))
+    forks = np.fromiter((repo.get("forks") or 0 for repo in repos), dtype=np.int64, count=len(repos))
+
+    # One sortable key per repo: stars first, then forks
+    score = stars * (int(forks.max()) + 1) + forks
+    if len(repos) > top_n:
+        # Everything above the cut-off score gets in; repos tied at it fill the rest in stored order
+        cutoff = np.partition(score, len(repos) - top_n)[len(repos) - top_n]
+        above = np.flatnonzero(score > cutoff)
+        tied = np.flatnonzero(score == cutoff)[:top_n - len(above)]
+        candidates = np.concatenate([above, tied])
+    else:
+        candidates = np.arange(len(repos))
+    # Stable order among equal scores: original (stored) repo order
+    order = candidates[np.lexsort((candidates, -score[candidates]))]
+
+    return [
+        {"name": repos[i]["name"], "stars": int(stars[i]), "forks": int(forks[i])}
+        for i in order
+    ]
+
+def render_repo_stars_chart(data):
+    """Draws stars and forks as horizontal bars for {"username", "repos"}."""
+    import numpy as np
+    from matplotlib.figure import Figure
+
+    username = data["username"]
+    # Most starred at the top
+    repos = list(reversed(data["repos"]))
+    names = [repo["name"] for repo in repos]
+    stars = [repo["stars"] for repo in repos]
+    forks = [repo["forks"] for repo in repos]
+
+    positions = np.arange(len(repos))
+    bar_height = 0.4
+
+    fig = Figure(figsize=(10, max(3, 0.6 * len(repos) + 1.5)))
+    ax = fig.subplots()
+    star_bars = ax.barh(positions + bar_height / 2, stars, height=bar_height, color="#f1c40f", label="Stars")
+    fork_bars = ax.barh(positions - bar_height / 2, forks, height=bar_height, color="#4C72B0", label="Forks")
+    ax.bar_label(star_bars, padding=3, fontsize=9)
+    ax.bar_label(fork_bars, padding=3, fontsize=9)
+
+    ax.set_yticks(positions)
+    ax.set_yticklabels(names, fontsize=10)
+    ax.set_xlabel("Count")
+    ax.set_title(f"{username}'s Top Repositories by Stars", fontsize=14)
+    ax.legend(loc="lower right")
+    ax.margins(x=0.1)
+
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+def repo_stars_chart_spec(username, dataset=None, top_n=REPO_STARS_TOP_N):
+    if dataset is not None:
+        repos = dataset.repos or []
+    else:
+        repos = github_store.load_rows(username, "repos", ["name", "stars", "forks"])
+
+    top = top_repos(repos, top_n)
+    if not top:
+        return None
+    return ChartSpec(username, "repo_stars", {"username": username, "repos": top})
+
+def generate_repo_stars_chart(username, dataset=None):
+    spec = repo_stars_chart_spec(username, dataset)
+    if spec is None:
+        print("⚠️ No repositories found.")
+        return
+
+    chart_path = github_charts.get_or_render(spec)
+    if chart_path is None:
+        print("❌ Could not save the repo stars chart.")
+        return
+    print(f"✅ Repo stars chart saved to {chart_path}")
+    return chart_path
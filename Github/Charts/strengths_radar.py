@@ -1,34 +1,26 @@
-import json
-import matplotlib.pyplot as plt
-import numpy as np
+import io
 import os
+from common.chart_cache import ChartSpec
+from common.config import load_env
+from Github.dataset import github_store
+from Github.Charts.cache import github_charts
 
-def radar_chart(username):
-    # Paths
-    json_path = f"GitHub/data/{username}.json"
-    output_dir = "GitHub/output/Graphics"
-    os.makedirs(output_dir, exist_ok=True)
+load_env()
 
-    # Load data
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+# 300 dpi made this the slowest chart by far; it is shown scaled down anyway
+RADAR_DPI = int(os.getenv("GITHUB_RADAR_DPI", "150"))
 
-    # Extract raw metrics
-    stars = data.get("total_stars", 0)
-    forks = data.get("total_forks", 0)
-    pull_requests = data.get("total_pull_requests", 0)
-    issues = data.get("total_issues", 0)
-    total_contributions = data.get("contribution_calendar", {}).get("total_contributions", 0)
+def render_radar_chart(data):
+    """Draws the activity radar for {"username", "labels", "values"}."""
+    import numpy as np
+    from matplotlib.figure import Figure
 
-    labels = ["Stars", "Forks", "Pull Requests", "Issues", "Contributions"]
-    values = [stars, forks, pull_requests, issues, total_contributions]
+    username = data["username"]
+    labels = data["labels"]
+    values = data["values"]
 
     # Calculate percentages
     total_sum = sum(values)
-    if total_sum == 0:
-        print("[WARNING] All metrics are zero — chart will be blank.")
-        return
-
     percentages = [(v / total_sum) * 100 for v in values]
 
     # Fixed shape: use same value for all radar axes
@@ -41,7 +33,8 @@ def radar_chart(username):
     angles = np.linspace(0, 2 * np.pi, len(labels) + 1, endpoint=True)
 
     # Create radar chart
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
+    fig = Figure(figsize=(8, 8))
+    ax = fig.subplots(subplot_kw=dict(polar=True))
     
     # Plot actual percentages
     ax.plot(angles, percentages, linewidth=2, linestyle='solid', label="Activity %", color="blue")
@@ -73,11 +66,42 @@ def radar_chart(username):
     ax.set_ylim(0, 100)
     ax.set_yticklabels([])
 
-    # Save chart
-    output_path = os.path.join(output_dir, f"{username}_radar_chart_percentages.png")
-    plt.savefig(output_path, bbox_inches="tight", dpi=300)
-    plt.close()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight", dpi=data.get("dpi", RADAR_DPI))
+    return buffer.getvalue()
+
+def radar_chart_spec(username, dataset=None):
+    # Load data
+    data = dataset or github_store.load(username, [
+        "total_stars", "total_forks", "total_pull_requests", "total_issues", "contribution_calendar"
+    ])
+
+    # Extract raw metrics
+    stars = data.get("total_stars", 0)
+    forks = data.get("total_forks", 0)
+    pull_requests = data.get("total_pull_requests", 0)
+    issues = data.get("total_issues", 0)
+    total_contributions = data.get("contribution_calendar", {}).get("total_contributions", 0)
+
+    labels = ["Stars", "Forks", "Pull Requests", "Issues", "Contributions"]
+    values = [stars, forks, pull_requests, issues, total_contributions]
+
+    if sum(values) == 0:
+        return None
+    return ChartSpec(username, "radar", {"username": username, "labels": labels, "values": values, "dpi": RADAR_DPI})
+
+def radar_chart(username, dataset=None):
+    spec = radar_chart_spec(username, dataset)
+    if spec is None:
+        print("[WARNING] All metrics are zero — chart will be blank.")
+        return
+
+    output_path = github_charts.get_or_render(spec)
+    if output_path is None:
+        print("[ERROR] Could not save the radar chart.")
+        return
     print(f"[INFO] Radar chart saved to {output_path}")
+    return output_path
 
 if __name__ == "__main__":
     radar_chart("IshaanPathak25")
@@ -0,0 +1,30 @@
+from common.dataset_store import DatasetStore
+from common.records import Record
+
+REPO_COLUMNS = ["name", "description", "language", "all_languages", "stars", "forks", "html_url"]
+
+# Github/data/{username}.sqlite (or .json): profile fields plus a repos table
+github_store = DatasetStore(
+    "Github/data",
+    tables={"repos": REPO_COLUMNS},
+    json_columns={"all_languages"}
+)
+
+class GithubDataset(Record):
+    """
+    A scraped GitHub profile, loaded once per pipeline run and shared by the
+    analyzer and the charts.
+    """
+
+    __slots__ = (
+        "username", "name", "bio", "location", "public_repos_count", "followers", "following",
+        "profile_url", "avatar_url", "contribution_calendar", "monthly_contributions",
+        "total_stars", "total_forks", "total_pull_requests", "total_issues", "repos"
+    )
+
+    @classmethod
+    def load(cls, username):
+        return cls.from_dict(github_store.load(username))
+
+    def save(self):
+        return github_store.save(self.username, self.to_dict())
@@ -1,24 +1,37 @@
 import requests
 import os
 import json
-from dotenv import load_dotenv
 from collections import defaultdict
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from common.atomic import atomic_write_json
+from common.config import load_env
+from .dataset import GithubDataset
+from .http_client import GITHUB_TOKEN, github_get, github_graphql
 
 GITHUB_API_BASE = "https://api.github.com"
 GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
 
-load_dotenv()
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+load_env()
 
-HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github+json"
-} if GITHUB_TOKEN else {}
+# Max parallel /languages requests per user (1 = fetch serially)
+LANGUAGE_FETCH_WORKERS = int(os.getenv("GITHUB_LANGUAGE_WORKERS", "8"))
+
+# "graphql" collects everything in a handful of GraphQL queries, "rest" uses the REST fan-out
+FETCH_MODE = os.getenv("GITHUB_FETCH_MODE", "graphql").lower()
+# Languages kept per repo in GraphQL mode (the API allows at most 100)
+GRAPHQL_LANGUAGES_PER_REPO = int(os.getenv("GITHUB_GRAPHQL_LANGUAGES", "100"))
+
+# Per-user cache of closed contribution-calendar years
+CALENDAR_CACHE_DIR = "Github/data/calendar"
+# With the account creation date known, fetch every year window up front in aliased batches
+CALENDAR_PARALLEL = os.getenv("GITHUB_CALENDAR_PARALLEL", "1") != "0"
+CALENDAR_YEARS_PER_QUERY = int(os.getenv("GITHUB_CALENDAR_YEARS_PER_QUERY", "5"))
+CALENDAR_FETCH_WORKERS = int(os.getenv("GITHUB_CALENDAR_WORKERS", "4"))
 
 def fetch_user_profile(username):
     url = f"{GITHUB_API_BASE}/users/{username}"
-    response = requests.get(url, headers=HEADERS)
+    response = github_get(url)
     if response.status_code != 200:
         raise Exception(f"Failed to fetch profile: {response.status_code} - {response.text}")
     return response.json()
@@ -28,7 +41,7 @@ def fetch_user_repos(username):
     page = 1
     while True:
         url = f"{GITHUB_API_BASE}/users/{username}/repos?per_page=100&page={page}"
-        response = requests.get(url, headers=HEADERS)
+        response = github_get(url)
         if response.status_code != 200:
             raise Exception(f"Failed to fetch repositories: {response.status_code} - {response.text}")
         data = response.json()
@@ -40,88 +53,218 @@ def fetch_user_repos(username):
 
 def fetch_repo_languages(full_name):
     url = f"{GITHUB_API_BASE}/repos/{full_name}/languages"
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code == 200:
+    try:
+        response = github_get(url)
+    except requests.RequestException:
+        response = None
+    if response is not None and response.status_code == 200:
         return response.json()
     else:
         print(f"⚠️ Could not fetch languages for {full_name}")
         return {}
 
-def fetch_contribution_calendar(username):
-    all_daily_contributions = []
-    total_contributions_sum = 0
+def fetch_all_repo_languages(repos, max_workers=LANGUAGE_FETCH_WORKERS):
+    """
+    Fetches the language breakdown of every repo using a bounded thread pool
+    over the shared client session. Results come back in the same order as `repos`.
+    """
+    full_names = [repo["full_name"] for repo in repos]
+    if not full_names:
+        return []
 
-    today = datetime.today()
-    current_to = today
-    current_from = today - timedelta(days=365)
-
-    query = """
-    query($login: String!, $from: DateTime!, $to: DateTime!) {
-      user(login: $login) {
-        contributionsCollection(from: $from, to: $to) {
-          contributionCalendar {
-            totalContributions
-            weeks {
-              contributionDays {
-                date
-                contributionCount
-              }
-            }
+    workers = max(1, min(max_workers, len(full_names)))
+    if workers == 1:
+        return [fetch_repo_languages(name) for name in full_names]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fetch_repo_languages, full_names))
+
+def graphql_request(query, variables):
+    response = github_graphql(GITHUB_GRAPHQL_URL, {"query": query, "variables": variables})
+
+    if response.status_code != 200:
+        raise Exception(f"GraphQL error: {response.status_code} - {response.text}")
+
+    payload = response.json()
+    if payload.get("errors"):
+        messages = "; ".join(err.get("message", "") for err in payload["errors"])
+        raise Exception(f"GraphQL error: {messages}")
+    return payload["data"]
+
+CALENDAR_QUERY = """
+query($login: String!, $from: DateTime!, $to: DateTime!) {
+  user(login: $login) {
+    contributionsCollection(from: $from, to: $to) {
+      contributionCalendar {
+        totalContributions
+        weeks {
+          contributionDays {
+            date
+            contributionCount
           }
         }
       }
     }
-    """
+  }
+}
+"""
 
-    while True:
-        variables = {
-            "login": username,
-            "from": current_from.isoformat(),
-            "to": current_to.isoformat()
-        }
-        response = requests.post(
-            GITHUB_GRAPHQL_URL,
-            headers=HEADERS,
-            json={"query": query, "variables": variables}
-        )
+def calendar_cache_path(username):
+    return os.path.join(CALENDAR_CACHE_DIR, f"{username}.json")
 
-        if response.status_code != 200:
-            raise Exception(f"GraphQL error: {response.status_code} - {response.text}")
+def load_calendar_cache(username):
+    path = calendar_cache_path(username)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("years", {})
+    except (OSError, ValueError):
+        return {}
 
-        data = response.json()
-        weeks = data["data"]["user"]["contributionsCollection"]["contributionCalendar"]["weeks"]
+def save_calendar_cache(username, years):
+    atomic_write_json(calendar_cache_path(username), {"years": years})
+
+def year_window(year, now):
+    start = datetime(year, 1, 1)
+    end = min(datetime(year, 12, 31, 23, 59, 59), now)
+    return start, end
+
+def fetch_calendar_window(username, start, end):
+    variables = {
+        "login": username,
+        "from": start.isoformat(),
+        "to": end.isoformat()
+    }
+    data = graphql_request(CALENDAR_QUERY, variables)
+    weeks = data["user"]["contributionsCollection"]["contributionCalendar"]["weeks"]
+
+    return [
+        {
+            "date": day["date"],
+            "count": day["contributionCount"]
+        }
+        for week in weeks
+        for day in week["contributionDays"]
+    ]
 
-        daily_contribs = [
+def fetch_calendar_years(username, years, now):
+    """
+    Fetches several year windows in one GraphQL query by aliasing
+    contributionsCollection once per year. Returns {year: daily list}.
+    """
+    windows = []
+    for year in years:
+        start, end = year_window(year, now)
+        windows.append(
+            f'y{year}: contributionsCollection(from: "{start.isoformat()}", to: "{end.isoformat()}") '
+            "{ contributionCalendar { weeks { contributionDays { date contributionCount } } } }"
+        )
+    query = "query($login: String!) { user(login: $login) { %s } }" % "\n".join(windows)
+    data = graphql_request(query, {"login": username})
+
+    return {
+        year: [
             {
                 "date": day["date"],
                 "count": day["contributionCount"]
             }
-            for week in weeks
+            for week in data["user"][f"y{year}"]["contributionCalendar"]["weeks"]
             for day in week["contributionDays"]
         ]
+        for year in years
+    }
 
-        if not daily_contribs or all(d["count"] == 0 for d in daily_contribs):
-            break
+def fetch_calendar_years_parallel(username, years, now, per_query=CALENDAR_YEARS_PER_QUERY,
+                                  max_workers=CALENDAR_FETCH_WORKERS):
+    years = list(years)
+    per_query = max(1, per_query)
+    batches = [years[i:i + per_query] for i in range(0, len(years), per_query)]
+    if not batches:
+        return {}
 
-        all_daily_contributions.extend(daily_contribs)
-        total_contributions_sum += sum(d["count"] for d in daily_contribs)
+    results = {}
+    workers = max(1, min(max_workers, len(batches)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch_result in executor.map(lambda batch: fetch_calendar_years(username, batch, now), batches):
+            results.update(batch_result)
+    return results
 
-        current_to = current_from
-        current_from = current_from - timedelta(days=365)
+def summarize_year(daily_contribs):
+    # None is the negative-cache marker for a year without any activity
+    if not daily_contribs or all(d["count"] == 0 for d in daily_contribs):
+        return None
+    return {
+        "total": sum(d["count"] for d in daily_contribs),
+        "monthly": group_commits_by_month(daily_contribs)
+    }
 
-        if current_from.year < 2008:
-            break
+def fetch_contribution_calendar(username, use_cache=True, created_at=None):
+    """
+    Without `created_at`, walks back one calendar year at a time until 2008
+    or the first year without activity. With the account's `created_at`, all
+    year windows are known up front and are fetched concurrently in aliased
+    batches instead. Closed years never change, so their monthly totals (or a
+    None marker for empty years) are cached per user in Github/data/calendar
+    and only the current year is re-queried.
 
-    all_daily_contributions = {d["date"]: d["count"] for d in all_daily_contributions}
-    all_daily_contributions = [
-        {"date": k, "count": v} for k, v in sorted(all_daily_contributions.items())
-    ]
+    Returns (total_contributions, monthly_contributions).
+    """
+    now = datetime.today()
+    cached_years = load_calendar_cache(username) if use_cache else {}
+    cache_changed = False
+
+    total_contributions_sum = 0
+    monthly_contributions = {}
+
+    def add(summary):
+        nonlocal total_contributions_sum
+        if summary is not None:
+            total_contributions_sum += summary["total"]
+            # Keyed by month, so overlapping windows can't double count
+            monthly_contributions.update(summary["monthly"])
+
+    if created_at and CALENDAR_PARALLEL:
+        first_year = max(2008, int(str(created_at)[:4]))
+        years = range(first_year, now.year + 1)
+        missing = [year for year in years if year == now.year or str(year) not in cached_years]
+
+        fetched = fetch_calendar_years_parallel(username, missing, now)
+        for year in years:
+            key = str(year)
+            if year in fetched:
+                summary = summarize_year(fetched[year])
+                if year < now.year:
+                    cached_years[key] = summary
+                    cache_changed = True
+            else:
+                summary = cached_years[key]
+            add(summary)
+    else:
+        year = now.year
+        while year >= 2008:
+            key = str(year)
+            if year < now.year and key in cached_years:
+                summary = cached_years[key]
+            else:
+                summary = summarize_year(fetch_calendar_window(username, *year_window(year, now)))
+                if year < now.year:
+                    cached_years[key] = summary
+                    cache_changed = True
+
+            # An idle current year doesn't end the history, an idle closed year does
+            if summary is None and year < now.year:
+                break
+            add(summary)
+            year -= 1
+
+    if use_cache and cache_changed:
+        save_calendar_cache(username, cached_years)
 
-    return total_contributions_sum, all_daily_contributions
+    return total_contributions_sum, dict(sorted(monthly_contributions.items()))
 
 def fetch_pull_requests_count(username):
     url = f"{GITHUB_API_BASE}/search/issues?q=author:{username}+type:pr"
-    response = requests.get(url, headers=HEADERS)
+    response = github_get(url)
     if response.status_code == 200:
         return response.json().get("total_count", 0)
     else:
@@ -130,7 +273,7 @@ def fetch_pull_requests_count(username):
 
 def fetch_issues_count(username):
     url = f"{GITHUB_API_BASE}/search/issues?q=author:{username}+type:issue"
-    response = requests.get(url, headers=HEADERS)
+    response = github_get(url)
     if response.status_code == 200:
         return response.json().get("total_count", 0)
     else:
@@ -145,15 +288,13 @@ def group_commits_by_month(daily_contributions):
         monthly[month_key] += entry["count"]
     return dict(sorted(monthly.items(), key=lambda x: x[0]))
 
-def get_basic_github_data(username):
+def get_basic_github_data(username, max_workers=LANGUAGE_FETCH_WORKERS):
     profile = fetch_user_profile(username)
     repos = fetch_user_repos(username)
-    total_contributions, daily_contributions = fetch_contribution_calendar(username)
-
-    monthly_contributions = group_commits_by_month(daily_contributions)
-
-    # Free memory: remove daily_contributions now that monthly is computed
-    del daily_contributions  
+    repo_languages = fetch_all_repo_languages(repos, max_workers=max_workers)
+    total_contributions, monthly_contributions = fetch_contribution_calendar(
+        username, created_at=profile.get("created_at")
+    )
 
     stars_total = sum(repo["stargazers_count"] for repo in repos)
     forks_total = sum(repo["forks_count"] for repo in repos)
@@ -183,22 +324,147 @@ def get_basic_github_data(username):
                 "name": repo["name"],
                 "description": repo["description"],
                 "language": repo["language"],
-                "all_languages": fetch_repo_languages(repo["full_name"]),
+                "all_languages": languages,
                 "stars": repo["stargazers_count"],
                 "forks": repo["forks_count"],
                 "html_url": repo["html_url"]
             }
+            for repo, languages in zip(repos, repo_languages)
+        ]
+    }
+
+REPO_FIELDS_FRAGMENT = """
+fragment RepoFields on Repository {
+  name
+  description
+  url
+  stargazerCount
+  forkCount
+  primaryLanguage { name }
+  languages(first: $languages, orderBy: {field: SIZE, direction: DESC}) {
+    edges { size node { name } }
+  }
+}
+"""
+
+REPOS_CONNECTION = """
+repositories(first: 100, after: $cursor, privacy: PUBLIC, ownerAffiliations: [OWNER],
+             orderBy: {field: NAME, direction: ASC}) {
+  totalCount
+  pageInfo { hasNextPage endCursor }
+  nodes { ...RepoFields }
+}
+"""
+
+GRAPHQL_PROFILE_QUERY = """
+query($login: String!, $cursor: String, $languages: Int!) {
+  user(login: $login) {
+    login
+    name
+    bio
+    location
+    url
+    avatarUrl
+    createdAt
+    followers { totalCount }
+    following { totalCount }
+    pullRequests { totalCount }
+    issues { totalCount }
+    %s
+  }
+}
+%s
+""" % (REPOS_CONNECTION, REPO_FIELDS_FRAGMENT)
+
+GRAPHQL_REPOS_PAGE_QUERY = """
+query($login: String!, $cursor: String, $languages: Int!) {
+  user(login: $login) {
+    %s
+  }
+}
+%s
+""" % (REPOS_CONNECTION, REPO_FIELDS_FRAGMENT)
+
+def fetch_graphql_profile_and_repos(username, languages_per_repo=GRAPHQL_LANGUAGES_PER_REPO):
+    variables = {
+        "login": username,
+        "cursor": None,
+        "languages": max(1, min(languages_per_repo, 100))
+    }
+    data = graphql_request(GRAPHQL_PROFILE_QUERY, variables)
+    user = data.get("user")
+    if user is None:
+        raise Exception(f"Failed to fetch profile: user '{username}' not found")
+
+    connection = user["repositories"]
+    repos = list(connection["nodes"])
+    while connection["pageInfo"]["hasNextPage"]:
+        variables["cursor"] = connection["pageInfo"]["endCursor"]
+        connection = graphql_request(GRAPHQL_REPOS_PAGE_QUERY, variables)["user"]["repositories"]
+        repos.extend(connection["nodes"])
+
+    return user, repos
+
+def get_graphql_github_data(username, languages_per_repo=GRAPHQL_LANGUAGES_PER_REPO):
+    """
+    Same result as get_basic_github_data, but the profile, repos (with their
+    languages) and PR/issue counts come from paginated GraphQL queries
+    instead of one REST call per repo.
+    """
+    user, repos = fetch_graphql_profile_and_repos(username, languages_per_repo)
+    total_contributions, monthly_contributions = fetch_contribution_calendar(
+        username, created_at=user.get("createdAt")
+    )
+
+    return {
+        "username": username,
+        "name": user.get("name") or username,
+        "bio": user.get("bio") or None,
+        "location": user.get("location") or None,
+        "public_repos_count": user["repositories"]["totalCount"],
+        "followers": user["followers"]["totalCount"],
+        "following": user["following"]["totalCount"],
+        "profile_url": user.get("url"),
+        "avatar_url": user.get("avatarUrl"),
+        "contribution_calendar": {
+            "total_contributions": total_contributions
+        },
+        "monthly_contributions": monthly_contributions,
+        "total_stars": sum(repo["stargazerCount"] for repo in repos),
+        "total_forks": sum(repo["forkCount"] for repo in repos),
+        "total_pull_requests": user["pullRequests"]["totalCount"],
+        "total_issues": user["issues"]["totalCount"],
+        "repos": [
+            {
+                "name": repo["name"],
+                "description": repo["description"],
+                "language": (repo.get("primaryLanguage") or {}).get("name"),
+                "all_languages": {
+                    edge["node"]["name"]: edge["size"]
+                    for edge in repo["languages"]["edges"]
+                },
+                "stars": repo["stargazerCount"],
+                "forks": repo["forkCount"],
+                "html_url": repo["url"]
+            }
             for repo in repos
         ]
     }
 
-def save_github_data(username):
+def save_github_data(username, mode=FETCH_MODE, cancelled=None):
     print(f"📥 Fetching GitHub data for user: {username}...")
-    user_data = get_basic_github_data(username)
+    # GraphQL needs an authenticated token, so fall back to REST without one
+    if mode == "graphql" and GITHUB_TOKEN:
+        user_data = get_graphql_github_data(username)
+    else:
+        user_data = get_basic_github_data(username)
 
-    os.makedirs("Github/data", exist_ok=True)
-    filepath = f"Github/data/{username}.json"
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(user_data, f, indent=2)
+    dataset = GithubDataset.from_dict(user_data)
+    if cancelled is not None and cancelled.is_set():
+        # The pipeline gave up on this scrape; a newer run may be saving the same file
+        print(f"⏹️ GitHub scrape for {username} was abandoned, data not saved")
+        return None
+    filepath = dataset.save()
 
-    print(f"✅ GitHub data saved to {filepath}")
\ No newline at end of file
+    print(f"✅ GitHub data saved to {filepath}")
+    return dataset
\ No newline at end of file
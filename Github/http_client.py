@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from common.config import load_env
+from common.rate_limit import RateLimitWindow, TokenBucket
+from .response_cache import (
+    response_cache, conditional_headers, build_response, graphql_key, GRAPHQL_FRESH_SECONDS
+)
+
+load_env()
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+
+HEADERS = {
+    "Authorization": f"Bearer {GITHUB_TOKEN}",
+    "Accept": "application/vnd.github+json"
+} if GITHUB_TOKEN else {}
+
+# Connections kept alive per host; should cover GITHUB_LANGUAGE_WORKERS for every concurrent pipeline
+POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "32"))
+MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "4"))
+BACKOFF_FACTOR = float(os.getenv("GITHUB_BACKOFF_FACTOR", "0.5"))
+# Never sleep longer than this for a single rate-limit wait; give the response back instead
+MAX_RATE_LIMIT_WAIT = float(os.getenv("GITHUB_MAX_RATE_LIMIT_WAIT", "60"))
+# Process-wide request budget shared by every pipeline running in this process
+REQUESTS_PER_SECOND = float(os.getenv("GITHUB_REQUESTS_PER_SECOND", "10"))
+REQUEST_BURST = float(os.getenv("GITHUB_REQUEST_BURST", "20"))
+# Below this many remaining calls, spread the rest evenly until the window resets
+LOW_REMAINING_THRESHOLD = int(os.getenv("GITHUB_LOW_REMAINING", "50"))
+# Longest pause between two calls while spreading out the last few
+MAX_PACING_DELAY = float(os.getenv("GITHUB_MAX_PACING_DELAY", "2"))
+
+RETRY_STATUSES = {500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_bucket = TokenBucket(REQUESTS_PER_SECOND, REQUEST_BURST)
+# Latest X-RateLimit-* values, per resource ("core", "search", "graphql")
+_window = RateLimitWindow(LOW_REMAINING_THRESHOLD, MAX_PACING_DELAY)
+
+class RateLimitExhausted(requests.RequestException):
+    pass
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                # Connection-level failures only; status retries are handled in request()
+                retry = Retry(total=MAX_RETRIES, connect=MAX_RETRIES, read=2, status=0,
+                              backoff_factor=BACKOFF_FACTOR, allowed_methods=None)
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=retry)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+def resource_for(url):
+    if "/graphql" in url:
+        return "graphql"
+    if "/search/" in url:
+        return "search"
+    return "core"
+
+def record_rate_limit(response, resource):
+    remaining = response.headers.get("X-RateLimit-Remaining")
+    reset = response.headers.get("X-RateLimit-Reset")
+    if remaining is None or reset is None:
+        return
+    _window.update(remaining, reset, response.headers.get("X-RateLimit-Resource", resource))
+
+def parse_retry_after(value):
+    """
+    Seconds from a Retry-After header, which may be a number of seconds or an
+    HTTP-date; None if it is neither.
+    """
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+def retry_delay(response, attempt):
+    """
+    How long to wait before retrying `response`, or None if it should not be retried.
+    """
+    status = response.status_code
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None:
+        retry_after = parse_retry_after(retry_after)
+    if status in (403, 429):
+        if retry_after is not None:
+            return retry_after
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = float(response.headers.get("X-RateLimit-Reset", time.time()))
+            return max(reset - time.time(), 1)
+        if status == 429 or "secondary rate limit" in response.text.lower():
+            return BACKOFF_FACTOR * (2 ** attempt) * 4
+        return None
+    if status in RETRY_STATUSES:
+        return BACKOFF_FACTOR * (2 ** attempt)
+    return None
+
+def request(method, url, **kwargs):
+    """
+    Sends a request through the shared pooled session, respecting the
+    process-wide token bucket and GitHub's rate-limit headers. 5xx, 429 and
+    rate-limited 403 responses are retried with backoff; the last response
+    is returned so callers can keep checking status codes themselves.
+    """
+    session = get_session()
+    resource = resource_for(url)
+
+    for attempt in range(MAX_RETRIES + 1):
+        delay = _window.delay(resource)
+        if _window.exhausted(resource) and delay > MAX_RATE_LIMIT_WAIT:
+            raise RateLimitExhausted(f"GitHub {resource} rate limit exhausted, resets in {int(delay)}s")
+        if delay > 0:
+            time.sleep(delay)
+        _bucket.acquire()
+
+        response = session.request(method, url, **kwargs)
+        record_rate_limit(response, resource)
+
+        wait = retry_delay(response, attempt)
+        if wait is None or attempt == MAX_RETRIES or wait > MAX_RATE_LIMIT_WAIT:
+            return response
+        print(f"⚠️ GitHub returned {response.status_code}, retrying in {wait:.1f}s...")
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            # Primary limit exhausted: the pacing check at the top of the loop sleeps until reset
+            continue
+        if response.status_code in (403, 429) and REQUESTS_PER_SECOND > 0:
+            # Rate limits are shared, so hold back every caller: the next acquire() waits it out
+            _bucket.drain(wait)
+        else:
+            time.sleep(wait)
+
+    return response
+
+def github_get(url, use_cache=True, **kwargs):
+    """
+    GET with the on-disk conditional-request cache: fresh entries are served
+    locally, older ones are revalidated with If-None-Match/If-Modified-Since
+    and a 304 (which does not count against the primary rate limit) is
+    answered from the stored body.
+    """
+    if not use_cache or response_cache is None:
+        return request("GET", url, **kwargs)
+
+    entry = response_cache.get(url)
+    if entry is not None:
+        if response_cache.is_fresh(entry):
+            return build_response(url, entry)
+        kwargs["headers"] = {**kwargs.get("headers", {}), **conditional_headers(entry)}
+
+    response = request("GET", url, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        response_cache.refresh(url)
+        return build_response(url, entry)
+    if response.status_code == 200:
+        response_cache.put(url, response)
+    return response
+
+def github_post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+def github_graphql(url, payload, use_cache=True):
+    """
+    POSTs a GraphQL query. GraphQL has no ETags to revalidate against, so a
+    successful answer is reused for GITHUB_GRAPHQL_CACHE_SECONDS for the
+    same query and variables and then fetched again.
+    """
+    if not use_cache or response_cache is None or GRAPHQL_FRESH_SECONDS <= 0:
+        return github_post(url, json=payload)
+
+    key = graphql_key(url, payload)
+    entry = response_cache.get(key)
+    if entry is not None and time.time() - entry["stored_at"] < GRAPHQL_FRESH_SECONDS:
+        return build_response(url, entry)
+
+    response = github_post(url, json=payload)
+    # Partial answers carry "errors"; don't pin them
+    if response.status_code == 200 and not response.json().get("errors"):
+        response_cache.put(key, response, ttl_only=True)
+    return response
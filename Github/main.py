@@ -1,8 +1,14 @@
 import re
-import subprocess
 import os
-from .profile_analyzer import analyze_github_profile
-from .visual_generator import generate_visual_persona
+import time
+from common.singleflight import pipeline_flight
+from common.stages import StageGraph, StopPipeline
+from common.config import load_env
+from common.records import PersonaResult
+from common.result_cache import ResultCache
+from .dataset import github_store
+
+load_env()
 
 def extract_username_from_url(url):
     match = re.match(r"https?://github\.com/([A-Za-z0-9-]+)", url)
@@ -11,6 +17,10 @@ def extract_username_from_url(url):
     return match.group(1)
 
 def main():
+    from .github_scraper import save_github_data
+    from .profile_analyzer import analyze_github_profile
+    from .visual_generator import generate_visual_persona
+
     print("👋 Welcome to GitHub Profile Analyzer!")
     url = input("🔗 Enter GitHub profile URL: ").strip()
 
@@ -28,14 +38,14 @@ def main():
     username = extract_username_from_url(url)
     print(f"📥 Scraping data for: {username}...")
 
-    result = subprocess.run([os.sys.executable, "Github/github_scraper.py", url])
-
-    if result.returncode != 0:
-        print("❌ Failed to scrape GitHub data.")
+    try:
+        dataset = save_github_data(username)
+    except Exception as e:
+        print(f"❌ Failed to scrape GitHub data: {e}")
         return
 
     print(f"🧠 Generating persona for: {username}...")
-    analyze_github_profile(username)
+    analyze_github_profile(username, dataset=dataset)
 
     # 🔁 Ask if user wants a visual persona
     choice = input("🎨 Would you like to generate a visual persona as well? (y/n): ").lower().strip()
@@ -49,15 +59,103 @@ def main():
 if __name__ == "__main__":
     main()
 
-def run_github_pipeline(username):
-    from .github_scraper import save_github_data
-    save_github_data(username)
-    
-    from .profile_analyzer import analyze_github_profile
-    analyze_github_profile(username)
-    
-    from .visual_generator import generate_visual_persona
-    generate_visual_persona(username)
+# Stage names reported to the job queue; the charts render while the LLM analysis runs
+GITHUB_PIPELINE_STAGES = ["scrape", "analyze", "render", "language_chart", "repo_stars_chart", "monthly_chart"]
+# Stages of one run executing at once
+STAGE_WORKERS = int(os.getenv("GITHUB_STAGE_WORKERS", "3"))
+# Seconds each stage may take before the run gives up on it (GITHUB_<STAGE>_TIMEOUT)
+STAGE_TIMEOUTS = {
+    name: float(os.getenv(f"GITHUB_{name.upper()}_TIMEOUT", default))
+    for name, default in [
+        ("scrape", "180"), ("analyze", "300"), ("render", "120"),
+        ("language_chart", "120"), ("repo_stars_chart", "120"), ("monthly_chart", "120")
+    ]
+}
+
+# Generated personas are reused while younger than GITHUB_RESULT_MAX_AGE seconds,
+# or while a re-scrape returns exactly the same data
+github_results = ResultCache(
+    "github",
+    data_path=github_store.data_file,
+    artifacts=[
+        "Github/output/Script/{username}_github_profile.txt",
+        "Github/output/Image/{username}_github_persona.png"
+    ],
+    manifest_dir="Github/output/Manifest",
+    max_age=float(os.getenv("GITHUB_RESULT_MAX_AGE", "3600")),
+    max_bytes=int(os.getenv("GITHUB_OUTPUT_MAX_BYTES", str(200 * 1024 * 1024)))
+)
+
+def run_github_pipeline(username, progress=None, force=False, on_section=None):
+    # Concurrent runs for the same user share one execution, so the work and its output files aren't duplicated
+    return pipeline_flight.do(("github", username.lower()), _run_github_pipeline, username, progress, force, on_section)
+
+def _run_github_pipeline(username, progress=None, force=False, on_section=None):
+    report = progress or (lambda stage, status=None, seconds=None: None)
+    started = time.time()
+    # The scraped dataset and the generated script are passed between stages in memory
+    result = PersonaResult(platform="github", username=username, reused=False)
+
+    if not force and github_results.is_fresh(username):
+        print(f"⚡ Reusing recent GitHub persona for {username}")
+        github_results.touch(username)
+        result.reused = True
+        return result
+
+    def scrape(inputs):
+        from .github_scraper import save_github_data
+        result.dataset = save_github_data(username, cancelled=graph.cancelled)
+        if not force and github_results.is_unchanged(username):
+            print(f"⚡ GitHub data for {username} is unchanged, reusing persona")
+            github_results.record(username)
+            result.reused = True
+            raise StopPipeline()
+        return result.dataset
+
+    def analyze(inputs):
+        from .profile_analyzer import analyze_github_profile
+        result.script = analyze_github_profile(username, on_section=on_section, dataset=inputs["scrape"],
+                                               cancelled=graph.cancelled, force=force)
+        result.script_path = f"Github/output/Script/{username}_github_profile.txt"
+
+    def render(inputs):
+        from .visual_generator import generate_visual_persona
+        result.image_path = generate_visual_persona(username, script=result.script, dataset=inputs["scrape"], charts=False)
+
+    def warm_chart(spec):
+        # Rendered into the chart cache for the result page; written to disk only as CHART_PERSIST allows
+        from .Charts.cache import github_charts
+        if spec is not None:
+            github_charts.get_bytes(spec)
+
+    def language_chart(inputs):
+        from .Charts.language import language_chart_spec
+        warm_chart(language_chart_spec(username, dataset=inputs["scrape"]))
+
+    def repo_stars_chart(inputs):
+        from .Charts.repo_stars import repo_stars_chart_spec
+        warm_chart(repo_stars_chart_spec(username, dataset=inputs["scrape"]))
+
+    def monthly_chart(inputs):
+        # The result page plots the series client-side, so only the JSON payload is warmed
+        from .Charts.monthly_contribution_line import monthly_payload_spec
+        warm_chart(monthly_payload_spec(username, dataset=inputs["scrape"]))
+
+    graph = StageGraph(max_workers=STAGE_WORKERS, on_stage=report)
+    graph.add("scrape", scrape, timeout=STAGE_TIMEOUTS["scrape"])
+    graph.add("analyze", analyze, deps=["scrape"], timeout=STAGE_TIMEOUTS["analyze"])
+    graph.add("render", render, deps=["analyze", "scrape"], timeout=STAGE_TIMEOUTS["render"])
+    graph.add("language_chart", language_chart, deps=["scrape"], timeout=STAGE_TIMEOUTS["language_chart"])
+    graph.add("repo_stars_chart", repo_stars_chart, deps=["scrape"], timeout=STAGE_TIMEOUTS["repo_stars_chart"])
+    graph.add("monthly_chart", monthly_chart, deps=["scrape"], timeout=STAGE_TIMEOUTS["monthly_chart"])
+    try:
+        graph.run()
+    finally:
+        print(f"⏱️ GitHub pipeline stages: {graph.summary()}")
+
+    if not result.reused:
+        github_results.record(username, since=started)
+    return result
     
     # from visualizer import generate_all_charts
     # generate_all_charts(username)
@@ -1,23 +1,37 @@
-import json
 import os
-import cohere
 import textwrap
 import re  # Added for regex parsing
-from dotenv import load_dotenv
+from common.config import load_env
+from common.atomic import atomic_write
+from common.llm_cache import GenerationCancelled
+from common.section_stream import generate_sections
+from .dataset import github_store
 
-# Load API Key securely
-load_dotenv()
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
-client = cohere.Client(COHERE_API_KEY)
+# The LLM backend (Cohere or the local stand-in) is configured in common/llm.py
+load_env()
 
 WRAP_WIDTH = 155  # Max characters per line
 
+# Expected sections for GitHub persona
+PROFILE_SECTIONS = [
+    "Name", "Bio", "Location", "Development Interests", "Open Source Involvement",
+    "Technical Strengths", "Collaboration Style", "Notable Repositories", "Summary"
+]
+
+HEADER_PATTERN = re.compile(r"^\s*#+\s*(.*?)\s*$")
+
+def match_profile_header(line):
+    match = HEADER_PATTERN.match(line)
+    if not match:
+        return None
+    title = match.group(1).lower()
+    for section in PROFILE_SECTIONS:
+        if title == section.lower():
+            return section, ""
+    return None, ""
+
 def format_profile_output(raw_text, username):
-    # Expected sections for GitHub persona
-    sections = [
-        "Name", "Bio", "Location", "Development Interests", "Open Source Involvement",
-        "Technical Strengths", "Collaboration Style", "Notable Repositories", "Summary"
-    ]
+    sections = PROFILE_SECTIONS
     section_map = {section: "" for section in sections}
 
     for section in sections:
@@ -36,23 +50,31 @@ def format_profile_output(raw_text, username):
     return section_map
 
 
-def analyze_github_profile(username):
+def analyze_github_profile(username, on_section=None, dataset=None, cancelled=None, force=False):
+    """
+    Generates the profile script, saves it and returns its text (None on
+    failure). Pass the pipeline's `dataset` to skip reading it from disk;
+    nothing is saved once the `cancelled` event is set. `force` regenerates
+    instead of reusing a cached completion.
+    """
     print("🔍 Analyzing GitHub profile with Cohere...")
 
-    filepath = f"Github/data/{username}.json"
-    if not os.path.exists(filepath):
-        print(f"❌ Data file not found: {filepath}")
-        return
-
-    with open(filepath, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    if dataset is not None:
+        data = dataset
+        repos = (dataset.repos or [])[:10]  # Limit to 10 for safety
+    else:
+        if not github_store.exists(username):
+            print(f"❌ Data file not found: {github_store.json_path(username)}")
+            return
+        data = github_store.load(username, ["bio", "location"])
+        repos = github_store.load_rows(username, "repos", ["name", "description", "stars", "forks", "language"], limit=10)
 
     bio = data.get("bio", "N/A")
     location = data.get("location", "N/A")
 
     # Prepare repo summaries
     repo_summaries = []
-    for repo in data.get("repos", [])[:10]:  # Limit to 10 for safety
+    for repo in repos:
         summary = (
             f"- **{repo['name']}**: {repo.get('description') or 'No description'}"
             f" | ⭐ {repo['stars']} | 🍴 {repo['forks']} | 📝 Language: {repo['language'] or 'N/A'}"
@@ -90,27 +112,37 @@ Repositories:
 """.strip()
 
     try:
-        response = client.generate(
+        raw_output = generate_sections(
             model="command-r-plus",
             prompt=prompt,
             temperature=0.6,
-            max_tokens=1500
+            max_tokens=1500,
+            match_header=match_profile_header,
+            on_section=on_section,
+            fixed={"Name": username},
+            cancelled=cancelled,
+            force=force
         )
-        raw_output = response.generations[0].text.strip()
         #print("📄 Raw Cohere output:\n", raw_output)
 
         if not raw_output:
             print("❌ Empty response from Cohere.")
             return
 
+        if cancelled is not None and cancelled.is_set():
+            raise GenerationCancelled("Generation cancelled")
+
         formatted = format_profile_output(raw_output, username)
 
         os.makedirs("Github/output/Script", exist_ok=True)
         output_path = f"Github/output/Script/{username}_github_profile.txt"
-        with open(output_path, "w", encoding="utf-8") as f:
-            for key, value in formatted.items():
-                f.write(f"{key}:\n{value.strip()}\n\n")
+        script = "".join(f"{key}:\n{value.strip()}\n\n" for key, value in formatted.items())
+        with atomic_write(output_path) as f:
+            f.write(script)
 
         print(f"✅ GitHub profile analysis saved to {output_path}")
+        return script
+    except GenerationCancelled:
+        print(f"⏹️ GitHub analysis for {username} was abandoned, profile not saved")
     except Exception as e:
         print(f"❌ Cohere API error: {e}")
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import json
+import sqlite3
+import threading
+import time
+import requests
+from common.config import load_env
+
+load_env()
+
+CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", "Github/data/http_cache.sqlite")
+# Set GITHUB_HTTP_CACHE=0 to always hit the network
+CACHE_ENABLED = os.getenv("GITHUB_HTTP_CACHE", "1") != "0"
+# Entries younger than this are served without contacting GitHub at all
+FRESH_SECONDS = float(os.getenv("GITHUB_CACHE_FRESH_SECONDS", "60"))
+# GraphQL answers have no validators, so they are reused for this long and then refetched
+GRAPHQL_FRESH_SECONDS = float(os.getenv("GITHUB_GRAPHQL_CACHE_SECONDS", "600"))
+# Entries older than this are dropped instead of revalidated
+TTL_SECONDS = float(os.getenv("GITHUB_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Least recently used entries are evicted once the stored bodies exceed this size
+MAX_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+class ResponseCache:
+    """
+    SQLite-backed store of GitHub GET responses keyed by URL, keeping the
+    ETag / Last-Modified validators needed for conditional requests. GraphQL
+    responses are stored under graphql_key() and only expire by age.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=TTL_SECONDS, fresh_for=FRESH_SECONDS, max_bytes=MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.fresh_for = fresh_for
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    headers TEXT,
+                    body BLOB,
+                    size INTEGER,
+                    stored_at REAL,
+                    accessed_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, url):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT etag, last_modified, headers, body, stored_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[4] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url))
+            conn.commit()
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "headers": json.loads(row[2]),
+            "body": row[3],
+            "stored_at": row[4]
+        }
+
+    def is_fresh(self, entry):
+        return time.time() - entry["stored_at"] < self.fresh_for
+
+    def put(self, url, response, ttl_only=False):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified and self.fresh_for <= 0 and not ttl_only:
+            return
+        headers = {k: v for k, v in response.headers.items() if k.lower() in ("content-type", "etag", "last-modified", "link")}
+        body = response.content
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(headers), body, len(body), now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def refresh(self, url):
+        # A 304 confirmed the stored body is still current
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            conn.commit()
+
+    def _evict(self, conn):
+        conn.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in conn.execute("SELECT url, size FROM responses ORDER BY accessed_at ASC").fetchall():
+            conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+def graphql_key(url, payload):
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{url}#{digest}"
+
+def conditional_headers(entry):
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+def build_response(url, entry):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = entry["body"]
+    response.headers.update(entry["headers"])
+    response.encoding = "utf-8"
+    return response
+
+response_cache = ResponseCache() if CACHE_ENABLED else None
@@ -1,7 +1,7 @@
 from PIL import Image, ImageDraw, ImageFont
 import os
 import textwrap
-from Github.Charts.language import generate_language_pie_chart
+from common.atomic import atomic_save
 
 # === Configuration ===
 FONT_PATH = "arial.ttf"
@@ -106,20 +106,22 @@ def estimate_block_height(draw, title, content, title_font, body_font, max_width
         height += len(lines) * (body_font.getbbox("A")[3] + LINE_SPACING + 10)
     return height + LINE_SPACING * 2
 
-def generate_visual_persona(username, output_path = None):
+def generate_visual_persona(username, output_path = None, script=None, dataset=None, charts=True):
     if not output_path:
         output_path = f"Github/output/Image/{username}_github_persona.png"
 
-    input_txt = f"Github/output/Script/{username}_github_profile.txt"
-    
-    if not os.path.exists(input_txt):
-        print(f"❌ Persona text not found: {input_txt}")
-        return
+    # The pipeline hands over the script it just generated; otherwise read the saved one
+    if script is None:
+        input_txt = f"Github/output/Script/{username}_github_profile.txt"
+
+        if not os.path.exists(input_txt):
+            print(f"❌ Persona text not found: {input_txt}")
+            return
 
-    with open(input_txt, "r", encoding="utf-8") as f:
-        raw_text = f.read()
+        with open(input_txt, "r", encoding="utf-8") as f:
+            script = f.read()
 
-    sections = extract_sections(raw_text)
+    sections = extract_sections(script)
     
     # Load fonts
     try:
@@ -178,6 +180,11 @@ def generate_visual_persona(username, output_path = None):
             content = clean_quotes(content)
         right_y = draw_wrapped_block(draw, right_x, right_y, title, content, header_font, body_font, col_width)
         
-    img.save(output_path, "PNG")
+    atomic_save(output_path, lambda path: img.save(path, "PNG"))
     print(f"✅ GitHub Persona image generated at: {output_path}")
-    generate_language_pie_chart(username)
\ No newline at end of file
+
+    # The pipeline renders the charts as separate stages
+    if charts:
+        from Github.Charts.language import generate_language_pie_chart
+        generate_language_pie_chart(username, dataset=dataset)
+    return output_path
\ No newline at end of file
@@ -0,0 +1,26 @@
+from common.dataset_store import DatasetStore
+from common.records import Record
+
+POST_COLUMNS = ["fullname", "title", "selftext", "subreddit", "url", "score", "created_utc"]
+COMMENT_COLUMNS = ["fullname", "body", "subreddit", "link_permalink", "score", "created_utc"]
+
+# Reddit/data/{username}.sqlite (or .json): profile fields plus posts and comments tables
+reddit_store = DatasetStore(
+    "Reddit/data",
+    tables={"posts": POST_COLUMNS, "comments": COMMENT_COLUMNS}
+)
+
+class RedditDataset(Record):
+    """
+    A scraped Reddit account, loaded once per pipeline run and shared by the
+    persona generator.
+    """
+
+    __slots__ = ("username", "posts", "comments", "high_water")
+
+    @classmethod
+    def load(cls, username):
+        return cls.from_dict(reddit_store.load(username))
+
+    def save(self):
+        return reddit_store.save(self.username, self.to_dict())
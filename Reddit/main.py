@@ -1,12 +1,21 @@
 import os
 import subprocess
-from .persona_generator import generate_persona
-from .visual_generator import generate_visual_persona
+import time
+from common.singleflight import pipeline_flight
+from common.config import load_env
+from common.records import PersonaResult
+from common.result_cache import ResultCache
+from .dataset import reddit_store
+
+load_env()
 
 def extract_username(url):
     return url.rstrip("/").split("/")[-1]
 
 def main():
+    from .persona_generator import generate_persona
+    from .visual_generator import generate_visual_persona
+
     print("👋 Welcome to Reddit Persona Generator!")
     reddit_url = input("🔗 Enter Reddit profile URL: ").strip()
 
@@ -17,7 +26,7 @@ def main():
     username = extract_username(reddit_url)
     print(f"📥 Scraping data for: {username}...")
 
-    result = subprocess.run([os.sys.executable, "Reddit/reddit_scraper.py", reddit_url])
+    result = subprocess.run([os.sys.executable, "-m", "Reddit.reddit_scraper", reddit_url])
 
     if result.returncode != 0:
         print("❌ Failed to scrape Reddit data.")
@@ -38,15 +47,62 @@ def main():
 if __name__ == "__main__":
     main()
 
-def run_reddit_pipeline(username):
+# Stage names reported to the job queue, in pipeline order
+REDDIT_PIPELINE_STAGES = ["scrape", "analyze", "render"]
+
+# Generated personas are reused while younger than REDDIT_RESULT_MAX_AGE seconds,
+# or while a re-scrape returns exactly the same data
+reddit_results = ResultCache(
+    "reddit",
+    data_path=reddit_store.data_file,
+    artifacts=[
+        "Reddit/output/Script/{username}_reddit_profile.txt",
+        "Reddit/output/Image/{username}_reddit_persona.png"
+    ],
+    manifest_dir="Reddit/output/Manifest",
+    max_age=float(os.getenv("REDDIT_RESULT_MAX_AGE", "3600")),
+    max_bytes=int(os.getenv("REDDIT_OUTPUT_MAX_BYTES", str(200 * 1024 * 1024)))
+)
+
+def run_reddit_pipeline(username, progress=None, force=False, on_section=None):
+    # Concurrent runs for the same user share one execution, so the work and its output files aren't duplicated
+    return pipeline_flight.do(("reddit", username.lower()), _run_reddit_pipeline, username, progress, force, on_section)
+
+def _run_reddit_pipeline(username, progress=None, force=False, on_section=None):
+    report = progress or (lambda stage: None)
+    started = time.time()
+    # The scraped dataset and the generated script are passed between stages in memory
+    result = PersonaResult(platform="reddit", username=username, reused=False)
+
+    if not force and reddit_results.is_fresh(username):
+        print(f"⚡ Reusing recent Reddit persona for {username}")
+        reddit_results.touch(username)
+        result.reused = True
+        return result
+
     # Call the scraper
+    report("scrape")
     from .reddit_scraper import scrape_reddit_user
-    scrape_reddit_user(username)
+    result.dataset = scrape_reddit_user(username)
+    if result.dataset is None:
+        # The scraper already printed why; don't let the old data pass as a fresh scrape
+        raise Exception(f"Failed to scrape Reddit data for {username}")
+
+    if not force and reddit_results.is_unchanged(username):
+        print(f"⚡ Reddit data for {username} is unchanged, reusing persona")
+        reddit_results.record(username)
+        result.reused = True
+        return result
 
     # Call the persona generator
+    report("analyze")
     from .persona_generator import generate_persona
-    generate_persona(username)
+    result.script = generate_persona(username, on_section=on_section, dataset=result.dataset, force=force)
+    result.script_path = f"Reddit/output/Script/{username}_reddit_profile.txt"
 
     # Call the visual generator
+    report("render")
     from .visual_generator import generate_visual_persona
-    generate_visual_persona(username)
\ No newline at end of file
+    result.image_path = generate_visual_persona(username, script=result.script)
+    reddit_results.record(username, since=started)
+    return result
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from common.atomic import atomic_write_json
+from common.config import load_env
+from common.llm_cache import cached_generate
+from .prompt_builder import (
+    estimate_tokens, format_item, item_text, truncate_to_tokens,
+    ITEM_SEPARATOR, MAX_ITEM_TOKENS, PROMPT_TOKEN_BUDGET
+)
+
+load_env()
+
+# Tokens of activity summarized per map call
+CHUNK_TOKEN_BUDGET = int(os.getenv("REDDIT_CHUNK_TOKEN_BUDGET", "2500"))
+# Map calls in flight at once for one user
+MAP_WORKERS = int(os.getenv("REDDIT_MAP_WORKERS", "4"))
+SUMMARY_MAX_TOKENS = 400
+SUMMARY_CACHE_DIR = "Reddit/data/summaries"
+
+MAP_PROMPT = """
+You are helping build a persona of a Reddit user. Summarize the following slice of their activity as concise notes under these headings:
+Interests, Needs, Frustrations, Personality Traits, Tone of Voice, Writing Style, Quotes.
+Under Quotes, copy 1–3 striking sentences verbatim, each starting with '>'.
+Only use what is in the content. Be specific.
+
+Reddit Activity:
+{activity}
+""".strip()
+
+COMBINE_PROMPT = """
+You are helping build a persona of a Reddit user. The notes below summarize consecutive slices of their activity, oldest first. Merge them into one set of concise notes under these headings:
+Interests, Needs, Frustrations, Personality Traits, Tone of Voice, Writing Style, Quotes.
+Keep the most specific details. Under Quotes, keep 1–3 of the most striking quotes verbatim, each starting with '>'.
+Only use what is in the notes.
+
+Notes:
+{summaries}
+""".strip()
+
+def chunk_activity(posts, comments, chunk_tokens=CHUNK_TOKEN_BUDGET):
+    """
+    Splits the whole history into chunks of at most `chunk_tokens`, oldest
+    first. New activity only ever lands in the last chunks, so earlier
+    chunks keep the same content (and content hash) across runs.
+    """
+    items = sorted(posts + comments, key=lambda item: item.get("created_utc", 0))
+    chunks = []
+    current = []
+    used = 0
+    for item in items:
+        text = item_text(item)
+        if not text:
+            continue
+        entry = format_item(item, truncate_to_tokens(text, MAX_ITEM_TOKENS))
+        cost = estimate_tokens(entry)
+        if current and used + cost > chunk_tokens:
+            chunks.append("\n\n---\n\n".join(current))
+            current, used = [], 0
+        current.append(entry)
+        used += cost
+    if current:
+        chunks.append("\n\n---\n\n".join(current))
+    return chunks
+
+def chunk_hash(chunk):
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+def summary_cache_path(username):
+    return os.path.join(SUMMARY_CACHE_DIR, f"{username}.json")
+
+def load_summaries(username):
+    try:
+        with open(summary_cache_path(username), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def summarize_chunk(chunk):
+    return cached_generate(
+        model="command-r-plus",
+        prompt=MAP_PROMPT.format(activity=chunk),
+        temperature=0.3,
+        max_tokens=SUMMARY_MAX_TOKENS
+    )
+
+def combine_summaries(summaries):
+    return cached_generate(
+        model="command-r-plus",
+        prompt=COMBINE_PROMPT.format(summaries=ITEM_SEPARATOR.join(summaries)),
+        temperature=0.3,
+        max_tokens=SUMMARY_MAX_TOKENS
+    )
+
+def format_summaries(summaries):
+    return ITEM_SEPARATOR.join(f"Activity slice {i + 1}:\n{summary}" for i, summary in enumerate(summaries))
+
+def group_summaries(summaries, group_tokens=CHUNK_TOKEN_BUDGET):
+    # Oldest first and at least two per group, so every level shrinks and old groups stay stable
+    groups = []
+    current = []
+    used = 0
+    for summary in summaries:
+        cost = estimate_tokens(summary)
+        if len(current) >= 2 and used + cost > group_tokens:
+            groups.append(current)
+            current, used = [], 0
+        current.append(summary)
+        used += cost
+    if current:
+        groups.append(current)
+    return groups
+
+def fit_summaries(summaries, budget=PROMPT_TOKEN_BUDGET, max_workers=MAP_WORKERS):
+    """
+    Reduces chronological summaries until they fit `budget` tokens: while
+    they are too long, neighbouring summaries are merged by another
+    summarization pass (cached by the LLM cache). A lone summary that is
+    still too long is truncated.
+    """
+    while len(summaries) > 1 and estimate_tokens(format_summaries(summaries)) > budget:
+        groups = group_summaries(summaries)
+        print(f"🧩 Merging {len(summaries)} summaries into {len(groups)}")
+        workers = max(1, min(max_workers, len(groups)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            merged = list(executor.map(
+                lambda group: combine_summaries(group) if len(group) > 1 else group[0], groups
+            ))
+        summaries = [summary for summary in merged if summary]
+
+    return truncate_to_tokens(format_summaries(summaries), budget)
+
+def summarize_activity(username, posts, comments, max_workers=MAP_WORKERS):
+    """
+    Map step: summarizes every chunk of the user's history with bounded
+    parallelism. Summaries are cached per user by chunk content hash, so a
+    later run only summarizes chunks with new activity. Returns the
+    summaries in chronological order, merged down to the prompt token
+    budget, ready for the reduce prompt.
+    """
+    chunks = chunk_activity(posts, comments)
+    hashes = [chunk_hash(chunk) for chunk in chunks]
+    cached = load_summaries(username)
+
+    missing = [(h, chunk) for h, chunk in zip(hashes, chunks) if not cached.get(h)]
+    print(f"🧩 {len(chunks)} activity chunks, {len(missing)} to summarize")
+
+    if missing:
+        workers = max(1, min(max_workers, len(missing)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            summaries = list(executor.map(lambda pair: summarize_chunk(pair[1]), missing))
+        for (h, _), summary in zip(missing, summaries):
+            if summary:
+                cached[h] = summary
+
+    # Keep only the chunks that still exist so the cache doesn't grow forever
+    current = {h: cached[h] for h in hashes if cached.get(h)}
+    atomic_write_json(summary_cache_path(username), current)
+
+    return fit_summaries([current[h] for h in hashes if h in current], max_workers=max_workers)
@@ -1,12 +1,29 @@
-import json
 import os
-import cohere
-from dotenv import load_dotenv
-
-# Load API Key securely
-load_dotenv()
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
-client = cohere.Client(COHERE_API_KEY)
+from common.config import load_env
+from common.atomic import atomic_write
+from common.section_stream import generate_sections
+from .prompt_builder import build_activity_block, activity_tokens, PROMPT_TOKEN_BUDGET
+from .map_reduce import summarize_activity
+from .dataset import reddit_store
+
+# The LLM backend (Cohere or the local stand-in) is configured in common/llm.py
+load_env()
+
+# "single" packs activity into one prompt, "map_reduce" summarizes chunks of the full
+# history first, "auto" uses map-reduce when the history doesn't fit the prompt budget
+PERSONA_MODE = os.getenv("REDDIT_PERSONA_MODE", "auto").lower()
+
+PERSONA_SECTIONS = [
+    "Bio", "Interests", "Needs", "Frustrations", "Personality Traits",
+    "Tone of Voice", "Writing Style", "Notable Quotes"
+]
+
+def match_persona_header(line):
+    line = line.strip()
+    for key in PERSONA_SECTIONS:
+        if line.lower().startswith(f"{key.lower()}:"):
+            return key, line[len(key)+1:].strip()
+    return None
 
 def format_persona_to_sections(raw_text, username):
     sections = {
@@ -38,25 +55,11 @@ def format_persona_to_sections(raw_text, username):
 
     return sections
 
-def generate_persona(username):
-    print("🔄 Loading data...")
-    with open(f"Reddit/data/{username}.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    posts = data["posts"]
-    comments = data["comments"]
-
-    examples = []
-    for item in (posts + comments)[:15]:
-        if "title" in item:
-            title = item["title"]
-            body = item.get("selftext", "")
-            examples.append(f"Post: {title}\n{body}")
-        else:
-            examples.append(f"Comment: {item['body']}")
-
-    prompt = f"""
-You are an expert persona profiler. Based on the following Reddit activity, generate a complete and in-depth user persona.
+def build_persona_prompt(username, activity, summaries=False):
+    source = "summaries of a user's Reddit activity" if summaries else "Reddit activity"
+    label = "Reddit Activity Summaries" if summaries else "Reddit Activity"
+    return f"""
+You are an expert persona profiler. Based on the following {source}, generate a complete and in-depth user persona.
 
 The output should strictly follow these sections in this order:
 - Name (Use only the Reddit username: "{username}")
@@ -71,20 +74,49 @@ The output should strictly follow these sections in this order:
 
 Only use insights from the Reddit content provided. Be specific. Avoid generic output.
 
-Reddit Activity:
-{''.join(examples)}
+{label}:
+{activity}
 """.strip()
 
+def generate_persona(username, on_section=None, dataset=None, force=False):
+    """
+    Generates the persona script, saves it and returns its text (None on
+    failure). Pass the pipeline's `dataset` to skip reading it from disk;
+    `force` regenerates instead of reusing a cached completion.
+    """
+    print("🔄 Loading data...")
+    data = dataset or reddit_store.load(username, ["posts", "comments"])
+
+    posts = data.get("posts", [])
+    comments = data.get("comments", [])
+
+    mode = PERSONA_MODE
+    if mode == "auto":
+        mode = "map_reduce" if activity_tokens(posts, comments) > PROMPT_TOKEN_BUDGET else "single"
+
+    try:
+        if mode == "map_reduce":
+            # Reduce step over per-chunk summaries of the whole history
+            prompt = build_persona_prompt(username, summarize_activity(username, posts, comments), summaries=True)
+        else:
+            # Most informative activity that fits the prompt token budget
+            prompt = build_persona_prompt(username, build_activity_block(posts, comments))
+    except Exception as e:
+        print(f"❌ Error while summarizing Reddit activity: {e}")
+        return
+
     print("💬 Sending prompt to Cohere API...")
     try:
-        response = client.generate(
+        raw_output = generate_sections(
             model="command-r-plus",
             prompt=prompt,
             temperature=0.6,
-            max_tokens=1500
+            max_tokens=1500,
+            match_header=match_persona_header,
+            on_section=on_section,
+            fixed={"Name": username},
+            force=force
         )
-
-        raw_output = response.generations[0].text.strip()
         if not raw_output:
             print("❌ Empty response from Cohere.")
             return
@@ -93,11 +125,11 @@ Reddit Activity:
 
         formatted = "\n".join([f"{k}:\n{v.strip()}\n" for k, v in sections.items() if v.strip()])
 
-        os.makedirs("Reddit/output", exist_ok=True)
-        with open(f"Reddit/output/Script/{username}_reddit_profile.txt", "w", encoding="utf-8") as f:
+        with atomic_write(f"Reddit/output/Script/{username}_reddit_profile.txt") as f:
             f.write(formatted)
 
         print(f"✅ Persona saved to Reddit/output/Script/{username}_reddit_profile.txt")
+        return formatted
 
     except Exception as e:
         print(f"❌ Error during Cohere generation: {e}")
@@ -0,0 +1,143 @@
+import heapq
+import math
+import os
+import re
+from common.config import load_env
+
+load_env()
+
+# Tokens of Reddit activity packed into the persona prompt
+PROMPT_TOKEN_BUDGET = int(os.getenv("REDDIT_PROMPT_TOKEN_BUDGET", "3000"))
+# No single post or comment may take more than this many tokens
+MAX_ITEM_TOKENS = int(os.getenv("REDDIT_PROMPT_MAX_ITEM_TOKENS", "400"))
+# Items this similar (word-set Jaccard) to an already chosen one are skipped
+DUPLICATE_SIMILARITY = 0.85
+RECENCY_HALF_LIFE_DAYS = 90
+ITEM_SEPARATOR = "\n\n---\n\n"
+REMOVED_MARKERS = {"[removed]", "[deleted]"}
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+def estimate_tokens(text):
+    """
+    Token count from a BPE tokenizer when tiktoken is installed, otherwise
+    from word/punctuation pieces (long words usually split into several tokens).
+    """
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return sum(1 + len(piece) // 6 for piece in WORD_PATTERN.findall(text))
+
+def item_text(item):
+    if "title" in item:
+        body = item.get("selftext", "").strip()
+        if body in REMOVED_MARKERS:
+            body = ""
+        return f"{item['title']}\n{body}".strip()
+    body = item.get("body", "").strip()
+    return "" if body in REMOVED_MARKERS else body
+
+def format_item(item, text):
+    kind = "Post" if "title" in item else "Comment"
+    subreddit = item.get("subreddit")
+    header = f"{kind} in r/{subreddit}" if subreddit else kind
+    return f"{header}:\n{text}"
+
+def truncate_to_tokens(text, max_tokens):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(" ".join(words[:mid])) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return " ".join(words[:low]) + " …"
+
+def normalized_words(text):
+    return frozenset(re.findall(r"[a-z0-9']+", text.lower()))
+
+def is_near_duplicate(words, chosen_words):
+    if not words:
+        return True
+    for other in chosen_words:
+        overlap = len(words & other) / len(words | other)
+        if overlap >= DUPLICATE_SIMILARITY:
+            return True
+    return False
+
+def base_score(item, text, newest):
+    # Longer text carries more signal, with diminishing returns
+    length = math.log1p(len(text))
+    # Upvotes as a quality signal; negative scores still count a little
+    votes = math.log1p(max(item.get("score") or 0, 0)) + 1
+    age_days = max(newest - item.get("created_utc", newest), 0) / 86400
+    recency = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+    return length * votes * (0.5 + recency)
+
+def select_items(items, budget=PROMPT_TOKEN_BUDGET, max_item_tokens=MAX_ITEM_TOKENS):
+    """
+    Greedily picks the most informative items that fit in `budget` tokens.
+    Each pick from a subreddit lowers the score of the rest of that
+    subreddit, and near-duplicate texts are skipped. Returns the formatted
+    entries in pick order.
+    """
+    candidates = []
+    for item in items:
+        text = item_text(item)
+        if text:
+            candidates.append((item, text))
+    if not candidates:
+        return []
+
+    newest = max(item.get("created_utc", 0) for item, _ in candidates)
+    separator_tokens = estimate_tokens(ITEM_SEPARATOR)
+
+    # Max-heap of (-score, index, picks of that subreddit when scored)
+    heap = [(-base_score(item, text, newest), i, 0) for i, (item, text) in enumerate(candidates)]
+    heapq.heapify(heap)
+
+    picks_per_subreddit = {}
+    chosen_words = []
+    selected = []
+    used = 0
+
+    while heap and used < budget:
+        neg_score, i, seen_picks = heapq.heappop(heap)
+        item, text = candidates[i]
+        subreddit = item.get("subreddit")
+        picks = picks_per_subreddit.get(subreddit, 0)
+        if picks != seen_picks:
+            # Re-score with the current diversity penalty and try again later
+            score = -neg_score * (1 + seen_picks) / (1 + picks)
+            heapq.heappush(heap, (-score, i, picks))
+            continue
+
+        words = normalized_words(text)
+        if is_near_duplicate(words, chosen_words):
+            continue
+
+        entry = format_item(item, truncate_to_tokens(text, max_item_tokens))
+        cost = estimate_tokens(entry) + (separator_tokens if selected else 0)
+        if used + cost > budget:
+            continue
+
+        selected.append(entry)
+        chosen_words.append(words)
+        picks_per_subreddit[subreddit] = picks + 1
+        used += cost
+
+    return selected
+
+def activity_tokens(posts, comments):
+    return sum(estimate_tokens(item_text(item)) for item in posts + comments)
+
+def build_activity_block(posts, comments, budget=PROMPT_TOKEN_BUDGET):
+    return ITEM_SEPARATOR.join(select_items(posts + comments, budget))
@@ -1,55 +1,221 @@
 import os
-import praw
-from dotenv import load_dotenv
-import json
+import sqlite3
 import sys
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
+from common.config import load_env
+from common.rate_limit import RateLimitWindow, TokenBucket
+from .dataset import RedditDataset, reddit_store
 
-load_dotenv()
+load_env()
 
-# Authenticate with Reddit API
-reddit = praw.Reddit(
-    client_id=os.getenv("REDDIT_CLIENT_ID"),
-    client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
-    user_agent=os.getenv("REDDIT_USER_AGENT")
-)
+# Posts and comments fetched per listing; "all" walks back as far as Reddit allows (~1000)
+_limit = os.getenv("REDDIT_SCRAPE_LIMIT", "100")
+SCRAPE_LIMIT = None if _limit.lower() == "all" else int(_limit)
+# Set REDDIT_FULL_RESCRAPE=1 to ignore stored data and fetch every listing from scratch
+FULL_RESCRAPE = os.getenv("REDDIT_FULL_RESCRAPE", "0") == "1"
+
+# Listings fetched at once for one user
+LISTING_WORKERS = int(os.getenv("REDDIT_LISTING_WORKERS", "4"))
+# Extra listings merged into the dataset besides "new", e.g. "top,controversial"
+EXTRA_LISTINGS = [name.strip() for name in os.getenv("REDDIT_EXTRA_LISTINGS", "").split(",") if name.strip()]
+# Process-wide page budget shared by every listing fetch (OAuth clients get ~100 requests/minute)
+REQUESTS_PER_SECOND = float(os.getenv("REDDIT_REQUESTS_PER_SECOND", "1.5"))
+REQUEST_BURST = float(os.getenv("REDDIT_REQUEST_BURST", "5"))
+# Below this many remaining calls, spread the rest evenly until the window resets
+LOW_REMAINING_THRESHOLD = int(os.getenv("REDDIT_LOW_REMAINING", "20"))
+# Longest pause between two page requests while spreading out the last few
+MAX_PACING_DELAY = float(os.getenv("REDDIT_MAX_PACING_DELAY", "5"))
+RATE_LIMIT_WINDOW = 600
+# Items PRAW requests per listing page
+PAGE_SIZE = 100
+
+_idle = []
+_idle_lock = threading.Lock()
+_bucket = TokenBucket(REQUESTS_PER_SECOND, REQUEST_BURST)
+# Latest (remaining, reset timestamp) reported by any PRAW instance
+_window = RateLimitWindow(LOW_REMAINING_THRESHOLD, MAX_PACING_DELAY)
+
+def create_reddit():
+    import praw
+    return praw.Reddit(
+        client_id=os.getenv("REDDIT_CLIENT_ID"),
+        client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
+        user_agent=os.getenv("REDDIT_USER_AGENT")
+    )
+
+@contextmanager
+def reddit_client():
+    # PRAW instances aren't thread-safe, so each fetch borrows one exclusively;
+    # returned instances keep their OAuth token for the next scrape
+    with _idle_lock:
+        reddit = _idle.pop() if _idle else None
+    if reddit is None:
+        reddit = create_reddit()
+    try:
+        yield reddit
+    finally:
+        with _idle_lock:
+            _idle.append(reddit)
+
+def record_rate_limit(reddit):
+    limits = reddit.auth.limits
+    remaining = limits.get("remaining")
+    if remaining is None:
+        return
+    _window.update(remaining, limits.get("reset_timestamp") or time.time() + RATE_LIMIT_WINDOW)
+
+def paced(listing, reddit):
+    """
+    Iterates a PRAW listing, taking a token from the shared budget (and
+    honouring Reddit's reported remaining calls) before each page request.
+    """
+    iterator = iter(listing)
+    index = 0
+    while True:
+        new_page = index % PAGE_SIZE == 0
+        if new_page:
+            delay = _window.delay()
+            if delay > 0:
+                time.sleep(delay)
+            _bucket.acquire()
+        try:
+            thing = next(iterator)
+        except StopIteration:
+            return
+        if new_page:
+            record_rate_limit(reddit)
+        index += 1
+        yield thing
 
 def extract_username(profile_url: str) -> str:
     return profile_url.rstrip('/').split('/')[-1]
 
-def scrape_reddit_user(profile_url: str, limit=100):
+def post_to_item(submission):
+    return {
+        "fullname": submission.fullname,
+        "title": submission.title,
+        "selftext": submission.selftext,
+        "subreddit": str(submission.subreddit),
+        "url": submission.url,
+        "score": submission.score,
+        "created_utc": submission.created_utc
+    }
+
+def comment_to_item(comment):
+    return {
+        "fullname": comment.fullname,
+        "body": comment.body,
+        "subreddit": str(comment.subreddit),
+        "link_permalink": comment.permalink,
+        "score": comment.score,
+        "created_utc": comment.created_utc
+    }
+
+def load_snapshot(username):
+    try:
+        return reddit_store.load(username)
+    except (OSError, ValueError, sqlite3.Error):
+        return None
+
+def high_water_mark(items):
+    # Newest item already stored; paging stops once the listing reaches it
+    if not items:
+        return None
+    newest = max(items, key=lambda item: item.get("created_utc", 0))
+    return {"created_utc": newest.get("created_utc", 0), "fullname": newest.get("fullname")}
+
+def fetch_new_items(listing, to_item, existing, mark, desc):
+    """
+    Walks a listing and converts items until it reaches the high-water mark
+    (pass mark=None for listings that aren't sorted newest first). PRAW
+    fetches pages lazily, so stopping early means already-seen pages are
+    never requested. Returns the new items in listing order.
+    """
+    seen = {item["fullname"] for item in existing if item.get("fullname")}
+    # Snapshots written before fullnames were stored are matched by timestamp
+    legacy_times = {item.get("created_utc") for item in existing if not item.get("fullname")}
+
+    new_items = []
+    for thing in tqdm(listing, desc=desc):
+        if mark is not None:
+            if thing.fullname == mark["fullname"] or thing.created_utc < mark["created_utc"]:
+                break
+        if thing.fullname in seen or thing.created_utc in legacy_times:
+            continue
+        new_items.append(to_item(thing))
+    return new_items
+
+def fetch_listing(username, kind, sort, existing, mark, limit):
+    with reddit_client() as reddit:
+        redditor = reddit.redditor(username)
+        source = redditor.submissions if kind == "posts" else redditor.comments
+        if sort == "new":
+            listing = source.new(limit=limit)
+        else:
+            listing = getattr(source, sort)(time_filter="all", limit=limit)
+            mark = None
+        to_item = post_to_item if kind == "posts" else comment_to_item
+        return fetch_new_items(paced(listing, reddit), to_item, existing, mark, f"Fetching {sort} {kind}")
+
+def dedupe(items):
+    unique = {}
+    for item in items:
+        unique.setdefault(item.get("fullname") or id(item), item)
+    return list(unique.values())
+
+def merge_items(new_items, existing):
+    return sorted(new_items + existing, key=lambda item: item.get("created_utc", 0), reverse=True)
+
+def scrape_reddit_user(profile_url: str, limit=SCRAPE_LIMIT, full=FULL_RESCRAPE, max_workers=LISTING_WORKERS):
     username = extract_username(profile_url)
-    redditor = reddit.redditor(username)
 
-    print(f"Scraping Reddit user: {username}")
-    data = {"username": username, "posts": [], "comments": []}
+    snapshot = None if full else load_snapshot(username)
+    if snapshot is None:
+        print(f"Scraping Reddit user: {username}")
+        snapshot = {"username": username, "posts": [], "comments": [], "high_water": {}}
+    else:
+        print(f"Refreshing Reddit user: {username}")
+    marks = snapshot.get("high_water") or {}
 
     try:
-        # Submissions (posts)
-        for submission in tqdm(redditor.submissions.new(limit=limit), desc="Fetching posts"):
-            data["posts"].append({
-                "title": submission.title,
-                "selftext": submission.selftext,
-                "subreddit": str(submission.subreddit),
-                "url": submission.url,
-                "created_utc": submission.created_utc
-            })
-
-        # Comments
-        for comment in tqdm(redditor.comments.new(limit=limit), desc="Fetching comments"):
-            data["comments"].append({
-                "body": comment.body,
-                "subreddit": str(comment.subreddit),
-                "link_permalink": comment.permalink,
-                "created_utc": comment.created_utc
-            })
+        # Posts and comments (plus any extra listings) are paged concurrently
+        fetches = [
+            (kind, sort)
+            for sort in ["new"] + EXTRA_LISTINGS
+            for kind in ("posts", "comments")
+        ]
+        new_items = {"posts": [], "comments": []}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(fetches)))) as executor:
+            futures = [
+                (kind, executor.submit(
+                    fetch_listing, username, kind, sort, snapshot[kind],
+                    marks.get(kind) or high_water_mark(snapshot[kind]), limit
+                ))
+                for kind, sort in fetches
+            ]
+            for kind, future in futures:
+                new_items[kind] += future.result()
+        new_posts = dedupe(new_items["posts"])
+        new_comments = dedupe(new_items["comments"])
+
+        posts = merge_items(new_posts, snapshot["posts"])
+        comments = merge_items(new_comments, snapshot["comments"])
+        dataset = RedditDataset(
+            username=username,
+            posts=posts,
+            comments=comments,
+            high_water={"posts": high_water_mark(posts), "comments": high_water_mark(comments)}
+        )
 
         # Save to file
-        os.makedirs("Reddit/data", exist_ok=True)
-        with open(f"Reddit/data/{username}.json", "w", encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        path = dataset.save()
 
-        print(f"✅ Data saved to Reddit/data/{username}.json")
+        print(f"✅ Data saved to {path} ({len(new_posts)} new posts, {len(new_comments)} new comments)")
+        return dataset
 
     except Exception as e:
         print(f"❌ Error scraping {username}: {e}")
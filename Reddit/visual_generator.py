@@ -1,6 +1,7 @@
 from PIL import Image, ImageDraw, ImageFont
 import os
 import textwrap
+from common.atomic import atomic_save
 
 # === Configuration ===
 FONT_PATH = "arial.ttf"
@@ -105,20 +106,22 @@ def estimate_block_height(draw, title, content, title_font, body_font, max_width
         height += len(lines) * (body_font.getbbox("A")[3] + LINE_SPACING + 10)
     return height + LINE_SPACING * 2
 
-def generate_visual_persona(username, output_path = None):
+def generate_visual_persona(username, output_path = None, script=None):
     if not output_path:
         output_path = f"Reddit/output/Image/{username}_reddit_persona.png"
 
-    input_txt = f"Reddit/output/Script/{username}_reddit_profile.txt"
-    
-    if not os.path.exists(input_txt):
-        print(f"❌ Persona text not found: {input_txt}")
-        return
+    # The pipeline hands over the script it just generated; otherwise read the saved one
+    if script is None:
+        input_txt = f"Reddit/output/Script/{username}_reddit_profile.txt"
 
-    with open(input_txt, "r", encoding="utf-8") as f:
-        raw_text = f.read()
+        if not os.path.exists(input_txt):
+            print(f"❌ Persona text not found: {input_txt}")
+            return
 
-    sections = extract_sections(raw_text)
+        with open(input_txt, "r", encoding="utf-8") as f:
+            script = f.read()
+
+    sections = extract_sections(script)
 
     # Load fonts
     try:
@@ -177,5 +180,6 @@ def generate_visual_persona(username, output_path = None):
             content = clean_quotes(content)
         right_y = draw_wrapped_block(draw, right_x, right_y, title, content, header_font, body_font, col_width)
 
-    img.save(output_path, "PNG")
+    atomic_save(output_path, lambda path: img.save(path, "PNG"))
     print(f"✅ Reddit Persona image generated at: {output_path}")
+    return output_path
@@ -1,16 +1,36 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify
-from flask import send_file
-from Reddit.main import run_reddit_pipeline
-from Github.main import run_github_pipeline
+from flask import send_file, Response, stream_with_context
+from Reddit.main import run_reddit_pipeline, REDDIT_PIPELINE_STAGES, reddit_results
+from Github.main import run_github_pipeline, GITHUB_PIPELINE_STAGES, github_results
 from jinja2 import StrictUndefined
-from Github.Charts.language import generate_language_pie_chart
-from Github.Charts.monthly_contribution_line import generate_monthly_chart
+from common.jobs import JobManager
+from common.importtime import profile_imports, format_report
+import click
+import json
 import os
 
 app = Flask(__name__)
 app.secret_key = "your_secret_key_here"
 app.jinja_env.undefined = StrictUndefined
 
+# Background workers for /analyze; each runs one full pipeline at a time
+jobs = JobManager(max_workers=int(os.getenv("ANALYZE_WORKERS", "4")))
+
+PIPELINES = {
+    "reddit": (run_reddit_pipeline, REDDIT_PIPELINE_STAGES),
+    "github": (run_github_pipeline, GITHUB_PIPELINE_STAGES),
+}
+
+RESULT_CACHES = {
+    "reddit": reddit_results,
+    "github": github_results,
+}
+
+RESULT_PATHS = {
+    "reddit": "Reddit/output/Script/{username}_reddit_profile.txt",
+    "github": "Github/output/Script/{username}_github_profile.txt",
+}
+
 
 @app.route("/")
 def home():
@@ -21,50 +41,109 @@ def home():
 def analyze():
     platform = request.form.get("platform")
     url = request.form.get("url")
+    force = request.form.get("force") == "on"
 
     if not platform or not url:
         flash("❌ Please select a platform and enter a profile URL.")
         return redirect(url_for("home"))
 
-    try:
-        # Safely extract username
-        if platform == "reddit":
-            if "reddit.com/user/" not in url:
-                flash("❌ Invalid Reddit URL format.")
-                return redirect(url_for("home"))
-            username = url.strip().split("/user/")[-1].strip("/")
+    # Safely extract username
+    if platform == "reddit":
+        if "reddit.com/user/" not in url:
+            flash("❌ Invalid Reddit URL format.")
+            return redirect(url_for("home"))
+        username = url.strip().split("/user/")[-1].strip("/")
 
-            run_reddit_pipeline(username)
-            result_path = f"Reddit/output/Script/{username}_reddit_profile.txt"
+    elif platform == "github":
+        if "github.com/" not in url:
+            flash("❌ Invalid GitHub URL format.")
+            return redirect(url_for("home"))
+        username = url.strip().split("github.com/")[-1].strip("/")
 
-        elif platform == "github":
-            if "github.com/" not in url:
-                flash("❌ Invalid GitHub URL format.")
-                return redirect(url_for("home"))
-            username = url.strip().split("github.com/")[-1].strip("/")
+    else:
+        flash("❌ Invalid platform selected.")
+        return redirect(url_for("home"))
 
-            run_github_pipeline(username)
-            result_path = f"Github/output/Script/{username}_github_profile.txt"
+    # Recent persona on disk: skip the pipeline entirely
+    if not force and RESULT_CACHES[platform].is_fresh(username):
+        return redirect(url_for("result", platform=platform, username=username))
+
+    # Run the pipeline in the background; identical in-flight requests share one job
+    pipeline, stages = PIPELINES[platform]
+    job = jobs.submit(platform, username, pipeline, stages, force=force)
+    return redirect(url_for("job_page", job_id=job.id))
+
+# Job status
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    status = job.to_dict()
+    if job.status == "done":
+        status["result_url"] = url_for("result", platform=job.platform, username=job.username)
+    return jsonify(status)
+
+# Server-sent events: stage progress and LLM sections as soon as they are ready
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    result_url = url_for("result", platform=job.platform, username=job.username)
+
+    def stream():
+        index = 0
+        while True:
+            events = job.wait_events(index)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for kind, data in events:
+                index += 1
+                if kind == "done":
+                    data = {"result_url": result_url}
+                yield f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+                if kind in ("done", "failed"):
+                    return
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/jobs/<job_id>/wait", methods=["GET"])
+def job_page(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        flash("❌ Analysis job not found. Please try again.")
+        return redirect(url_for("home"))
+    return render_template("pending.html", job=job.to_dict())
 
-        else:
-            flash("❌ Invalid platform selected.")
-            return redirect(url_for("home"))
+# Show a finished analysis
+@app.route("/result/<platform>/<username>", methods=["GET"])
+def result(platform, username):
+    if platform not in RESULT_PATHS:
+        flash("❌ Invalid platform selected.")
+        return redirect(url_for("home"))
 
-        # Check result file exists
-        if not os.path.exists(result_path):
-            flash(f"❌ Could not generate profile for {username}. Please check the username or try again.")
-            return redirect(url_for("home"))
+    result_path = RESULT_PATHS[platform].format(username=username)
 
-        # Load and pass result
-        with open(result_path, "r", encoding="utf-8") as f:
-            result_text = f.read()
+    # Check result file exists
+    if not os.path.exists(result_path):
+        flash(f"❌ Could not generate profile for {username}. Please check the username or try again.")
+        return redirect(url_for("home"))
 
-        return render_template("result.html", result=result_text, username=username, platform=platform.capitalize())
+    RESULT_CACHES[platform].touch(username)
 
-    except Exception as e:
-        print("❌ ERROR:", e)  # Debug log
-        flash(f"❌ {platform.capitalize()} Analysis Error: {str(e)}")
-        return redirect(url_for("home"))
+    # Load and pass result
+    with open(result_path, "r", encoding="utf-8") as f:
+        result_text = f.read()
+
+    return render_template("result.html", result=result_text, username=username, platform=platform.capitalize())
     
 # Download persona image
 
@@ -95,37 +174,68 @@ def download_persona():
     
 # GitHub Charts
 
+def serve_chart(spec, missing_message):
+    """
+    Serves a cached chart straight from memory with its data hash as the
+    ETag, answering 304 when the browser already has the current version
+    and rendering only when no chart exists for the current data.
+    """
+    from common.chart_cache import cache_control
+    from Github.Charts.cache import github_charts
+
+    if spec is None:
+        return missing_message, 404
+
+    if spec.key in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(github_charts.get_bytes(spec), mimetype=spec.mimetype)
+    response.set_etag(spec.key)
+    response.headers["Cache-Control"] = cache_control()
+    return response
+
 @app.route("/github/<username>/language_chart", methods=["GET"])
 def get_language_chart(username):
     try:
-        chart_path = f"Github/output/Graphics/{username}_language_chart.png"
-        
-        # Generate chart if it doesn't exist
-        if not os.path.exists(chart_path):
-            generate_language_pie_chart(username)
-
-        return send_file(chart_path, mimetype="image/png")
+        from Github.Charts.language import language_chart_spec
+        return serve_chart(language_chart_spec(username), "No language data found")
 
+    except FileNotFoundError:
+        return f"No GitHub data found for {username}", 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
-# Monthly Contribution Line Chart
-@app.route("/github/<username>/monthly_contribution_line")
-def github_monthly_contribution_line(username):
+@app.route("/github/<username>/repo_stars_chart", methods=["GET"])
+def get_repo_stars_chart(username):
     try:
-        chart_path = f"Github/output/Graphics/{username}_monthly_contribution_line.png"
-        
-        # Generate chart if it doesn't exist
-        if not os.path.exists(chart_path):
-            generate_monthly_chart(username)
+        from Github.Charts.repo_stars import repo_stars_chart_spec
+        return serve_chart(repo_stars_chart_spec(username), "No repositories found")
 
-        if not os.path.exists(chart_path):
-            return "No monthly data found", 404
+    except FileNotFoundError:
+        return f"No GitHub data found for {username}", 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        return send_file(chart_path, mimetype="image/png")
+# Monthly Contribution Line Chart: standalone HTML chart, or ?format=json for the series the result page plots
+@app.route("/github/<username>/monthly_contribution_line")
+def github_monthly_contribution_line(username):
+    try:
+        from Github.Charts.monthly_contribution_line import monthly_chart_spec, monthly_payload_spec
+        if request.args.get("format") == "json":
+            return serve_chart(monthly_payload_spec(username), "No monthly data found")
+        return serve_chart(monthly_chart_spec(username), "No monthly data found")
 
+    except FileNotFoundError:
+        return f"No GitHub data found for {username}", 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+# flask --app app import-profile: slowest imports when loading the app in a fresh interpreter
+@app.cli.command("import-profile")
+@click.option("--module", default="app", help="Module to import.")
+@click.option("--top", default=25, help="Number of imports to show.")
+def import_profile(module, top):
+    click.echo(format_report(profile_imports(module, top)))
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
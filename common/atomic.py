@@ -0,0 +1,63 @@
+import json
+import os
+import uuid
+from contextlib import contextmanager
+
+def _temp_path(path):
+    directory, name = os.path.split(path)
+    os.makedirs(directory or ".", exist_ok=True)
+    # Keep the extension so writers that infer the format from it (savefig, write_html) still work
+    _, ext = os.path.splitext(name)
+    while True:
+        tmp_path = os.path.join(directory or ".", f".{name}.{uuid.uuid4().hex[:12]}.tmp{ext}")
+        try:
+            # 0666 minus the umask, like open() would give the file (mkstemp would make it 0600)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return tmp_path
+
+def _replace(tmp_path, path):
+    # Keep the permissions of the file being replaced
+    try:
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+    except FileNotFoundError:
+        pass
+    os.replace(tmp_path, path)
+
+@contextmanager
+def atomic_write(path, mode="w", encoding="utf-8"):
+    """
+    Opens a temp file next to `path` and renames it over `path` once the
+    block finishes, so readers only ever see the old or the complete new file.
+    """
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def atomic_write_json(path, data, **dump_kwargs):
+    with atomic_write(path) as f:
+        json.dump(data, f, **dump_kwargs)
+
+def atomic_save(path, save):
+    """
+    For libraries that write to a path themselves (PIL, matplotlib, plotly):
+    `save(tmp_path)` writes the temp file, which then replaces `path`.
+    """
+    tmp_path = _temp_path(path)
+    try:
+        save(tmp_path)
+        _replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from common.atomic import atomic_write
+from common.chart_service import render_chart
+from common.config import load_env
+from common.singleflight import SingleFlight
+
+load_env()
+
+# Total size of rendered charts kept on disk before the least recently served are deleted
+CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+# Encoded charts kept in memory for the chart routes
+CHART_MEMORY_MAX_BYTES = int(os.getenv("CHART_MEMORY_MAX_BYTES", str(32 * 1024 * 1024)))
+# "write_behind" persists rendered charts on a background thread, "sync" before returning, "off" never
+CHART_PERSIST = os.getenv("CHART_PERSIST", "write_behind").lower()
+# Seconds browsers may reuse a chart without revalidating; 0 means always revalidate (cheap 304s)
+CHART_MAX_AGE = int(os.getenv("CHART_CACHE_MAX_AGE", "0"))
+# Bump when a renderer's output changes so old cached charts stop matching
+RENDER_VERSION = 1
+
+class ChartSpec:
+    """
+    One chart to render: its type, the exact data it is drawn from and how
+    to draw it. `render()` returns the file content as bytes; the default
+    sends the data to the chart rendering service.
+    """
+
+    __slots__ = ("username", "chart_type", "data", "ext", "mimetype", "_render", "_key")
+
+    def __init__(self, username, chart_type, data, ext="png", mimetype="image/png", render=None):
+        self.username = username
+        self.chart_type = chart_type
+        self.data = data
+        self.ext = ext
+        self.mimetype = mimetype
+        self._render = render
+        self._key = None
+
+    @property
+    def key(self):
+        # Hash of everything that affects the output, also used as the ETag
+        if self._key is None:
+            payload = json.dumps(
+                {"chart": self.chart_type, "version": RENDER_VERSION, "data": self.data},
+                sort_keys=True, default=str
+            )
+            self._key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return self._key
+
+    def render(self):
+        if self._render is not None:
+            return self._render(self.data)
+        return render_chart(self.chart_type, self.data)
+
+class MemoryLRU:
+    """
+    Thread-safe LRU of bytes values bounded by their total size.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+class ChartCache:
+    """
+    Rendered charts keyed by the hash of their input data. Routes are served
+    from a size-bounded in-memory LRU of the encoded bytes; disk is a second
+    tier that survives restarts. A chart is only rendered when neither tier
+    has its current hash, so a re-scrape that changes the data produces a
+    new chart and identical data is never rendered twice.
+
+    On disk, files are named by hash, older versions are removed and the
+    least recently served files are evicted once the directory exceeds
+    max_bytes. `persist` is "write_behind" (write on a background thread),
+    "sync" or "off" (memory only).
+    """
+
+    def __init__(self, directory, max_bytes=CHART_CACHE_MAX_BYTES,
+                 memory_bytes=CHART_MEMORY_MAX_BYTES, persist=CHART_PERSIST):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.persist = persist
+        self.memory = MemoryLRU(memory_bytes)
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._writer = None
+
+    def path_for(self, spec):
+        return os.path.join(self.directory, f"{spec.username}_{spec.chart_type}.{spec.key[:16]}.{spec.ext}")
+
+    def lookup(self, spec):
+        path = self.path_for(spec)
+        return path if self._touch(path) else None
+
+    def _touch(self, path):
+        # mtime doubles as the last-served time for LRU eviction
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            return False
+        return True
+
+    def get_bytes(self, spec):
+        """
+        Returns the chart content for `spec` from memory, then disk, and
+        renders it only if neither has it.
+        """
+        content = self.memory.get(spec.key)
+        if content is not None:
+            if self.persist != "off":
+                # Keep the disk copy's last-served time current so eviction spares popular charts
+                self._touch(self.path_for(spec))
+            return content
+        # Concurrent requests for the same chart share one render
+        return self._flight.do(spec.key, self._load_or_render, spec)
+
+    def _load_or_render(self, spec):
+        content = self.memory.get(spec.key)
+        if content is not None:
+            return content
+
+        path = self.lookup(spec) if self.persist != "off" else None
+        if path is not None:
+            with open(path, "rb") as f:
+                content = f.read()
+        else:
+            content = spec.render()
+            if self.persist == "sync":
+                self._write(spec, content)
+            elif self.persist == "write_behind":
+                self._get_writer().submit(self._write, spec, content)
+
+        self.memory.put(spec.key, content)
+        return content
+
+    def get_or_render(self, spec):
+        """
+        Returns the path of the chart for `spec` on disk, rendering and
+        writing it first if needed, or None if it could not be written. For
+        callers that want a file, so it writes whatever `persist` is; code
+        that only warms the cache should call get_bytes().
+        """
+        path = self.lookup(spec)
+        if path is not None:
+            return path
+        content = self.get_bytes(spec)
+        path = self.lookup(spec)
+        return path if path is not None else self._write(spec, content)
+
+    def _get_writer(self):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-writer")
+        return self._writer
+
+    def _write(self, spec, content):
+        path = self.path_for(spec)
+        if os.path.exists(path):
+            return path
+        try:
+            with atomic_write(path, "wb") as f:
+                f.write(content)
+            self._remove_stale(spec, keep=path)
+            self.evict()
+        except OSError as e:
+            # Persisting is best effort; the chart is still served from memory
+            print(f"⚠️ Could not write chart {path}: {e}")
+            return None
+        return path
+
+    def _remove_stale(self, spec, keep):
+        prefix = f"{spec.username}_{spec.chart_type}."
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(prefix) and name.endswith(f".{spec.ext}") and path != keep:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.startswith("."):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+                    total += stat.st_size
+            for _, path, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+def cache_control():
+    if CHART_MAX_AGE > 0:
+        return f"public, max-age={CHART_MAX_AGE}"
+    return "no-cache"
@@ -0,0 +1,102 @@
+import atexit
+import importlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from common.config import load_env
+
+load_env()
+
+# Render processes kept warm with matplotlib loaded; 0 renders in the calling thread
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))
+CHART_TIMEOUT = float(os.getenv("CHART_TIMEOUT", "60"))
+# "spawn" keeps the Flask process's threads and locks out of the workers
+CHART_START_METHOD = os.getenv("CHART_START_METHOD", "spawn")
+
+# Chart type -> "module:function" taking the chart data dict and returning PNG bytes.
+# Looked up by name inside the workers, so only plain data crosses the process boundary.
+# Renderers use the matplotlib Figure API only (never pyplot), so they are safe to call
+# from any thread or render worker.
+RENDERERS = {
+    "language": "Github.Charts.language:render_language_chart",
+    "radar": "Github.Charts.strengths_radar:render_radar_chart",
+    "repo_stars": "Github.Charts.repo_stars:render_repo_stars_chart",
+}
+
+def _warm():
+    # Pay the matplotlib import once per worker instead of once per chart
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure  # noqa: F401
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: F401
+    return os.getpid()
+
+def _resolve(chart_type):
+    if chart_type not in RENDERERS:
+        raise ValueError(f"Unknown chart type '{chart_type}', expected one of {', '.join(RENDERERS)}")
+    module_name, function_name = RENDERERS[chart_type].split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def render_in_process(chart_type, data):
+    return _resolve(chart_type)(data)
+
+class ChartService:
+    """
+    Renders charts on a pool of worker processes. Each job is a chart type
+    plus the plain data to plot, and the result is the PNG bytes, so pyplot's
+    global state never touches the Flask threads and rasterization runs on
+    every core.
+    """
+
+    def __init__(self, workers=CHART_WORKERS, timeout=CHART_TIMEOUT, start_method=CHART_START_METHOD):
+        self.workers = workers
+        self.timeout = timeout
+        self.start_method = start_method
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(self.start_method),
+                        initializer=_warm
+                    )
+                    # Start every worker now so the first charts don't pay for process start-up
+                    for _ in range(self.workers):
+                        pool.submit(os.getpid)
+                    self._pool = pool
+        return self._pool
+
+    def submit(self, chart_type, data):
+        """
+        Queues a render and returns a Future for the PNG bytes.
+        """
+        return self._get_pool().submit(render_in_process, chart_type, data)
+
+    def render(self, chart_type, data):
+        if self.workers <= 0:
+            return render_in_process(chart_type, data)
+        try:
+            return self.submit(chart_type, data).result(timeout=self.timeout)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool next time
+            print("⚠️ Chart worker pool broke, rendering in-process")
+            self.shutdown()
+            return render_in_process(chart_type, data)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+chart_service = ChartService()
+atexit.register(chart_service.shutdown)
+
+def render_chart(chart_type, data):
+    return chart_service.render(chart_type, data)
@@ -0,0 +1,30 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Earlier files win for keys defined in more than one place
+ENV_FILES = [
+    os.path.join(ROOT_DIR, ".env"),
+    os.path.join(ROOT_DIR, "Reddit", ".env"),
+    os.path.join(ROOT_DIR, "Github", ".env"),
+]
+
+_loaded = False
+_lock = threading.Lock()
+
+def load_env():
+    """
+    Loads every .env file once per process. Modules call this before
+    reading settings at import time instead of each running load_dotenv().
+    """
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            for path in ENV_FILES:
+                if os.path.exists(path):
+                    load_dotenv(path)
+            _loaded = True
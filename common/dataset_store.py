@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+from common.atomic import atomic_save, atomic_write_json
+from common.config import load_env
+
+load_env()
+
+# "sqlite" stores datasets compactly with one table per row collection; "json" keeps the old indented files
+DATASET_FORMAT = os.getenv("DATASET_FORMAT", "sqlite").lower()
+
+class DatasetStore:
+    """
+    Per-user storage for one platform's scraped data. Scalar profile fields
+    live in a key/value table and each row collection (repos, posts,
+    comments) in its own table, so readers can load just the fields and
+    columns they need. Datasets saved as JSON, including the sample data in
+    the repository, are still read.
+    """
+
+    def __init__(self, directory, tables, json_columns=(), dataset_format=DATASET_FORMAT):
+        self.directory = directory
+        # {table name: [column, ...]} for the list-valued fields of the dataset
+        self.tables = tables
+        # Columns holding dicts or lists, stored as JSON text
+        self.json_columns = set(json_columns)
+        self.dataset_format = dataset_format
+
+    def sqlite_path(self, username):
+        return os.path.join(self.directory, f"{username}.sqlite")
+
+    def json_path(self, username):
+        return os.path.join(self.directory, f"{username}.json")
+
+    def data_file(self, username):
+        # The file the dataset is read from, preferring the compact format
+        path = self.sqlite_path(username)
+        return path if os.path.exists(path) else self.json_path(username)
+
+    def exists(self, username):
+        return os.path.exists(self.data_file(username))
+
+    def save(self, username, data):
+        os.makedirs(self.directory, exist_ok=True)
+        if self.dataset_format == "json":
+            atomic_write_json(self.json_path(username), data, indent=2)
+            # Don't leave an older compact copy around to shadow the new data
+            if os.path.exists(self.sqlite_path(username)):
+                os.remove(self.sqlite_path(username))
+            return self.json_path(username)
+        atomic_save(self.sqlite_path(username), lambda path: self._write(path, data))
+        return self.sqlite_path(username)
+
+    def _write(self, path, data):
+        conn = sqlite3.connect(path)
+        try:
+            # Small pages keep single-user files compact
+            conn.execute("PRAGMA page_size = 1024")
+            conn.execute("CREATE TABLE profile (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID")
+            conn.executemany(
+                "INSERT INTO profile VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in data.items() if key not in self.tables]
+            )
+            for table, columns in self.tables.items():
+                conn.execute(f"CREATE TABLE {table} ({', '.join(columns)})")
+                placeholders = ", ".join("?" for _ in columns)
+                conn.executemany(
+                    f"INSERT INTO {table} VALUES ({placeholders})",
+                    [tuple(self._encode(column, row.get(column)) for column in columns) for row in data.get(table, [])]
+                )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _encode(self, column, value):
+        return json.dumps(value) if column in self.json_columns and value is not None else value
+
+    def _decode(self, column, value):
+        return json.loads(value) if column in self.json_columns and value is not None else value
+
+    def _load_json(self, username):
+        with open(self.json_path(username), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load(self, username, fields=None):
+        """
+        Returns the dataset as a dict, limited to `fields` (profile keys or
+        table names) when given. Raises FileNotFoundError if the user has no
+        stored data.
+        """
+        path = self.data_file(username)
+        if not path.endswith(".sqlite"):
+            data = self._load_json(username)
+            return data if fields is None else {key: data[key] for key in fields if key in data}
+
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            if fields is None:
+                rows = conn.execute("SELECT key, value FROM profile").fetchall()
+            else:
+                keys = [key for key in fields if key not in self.tables]
+                placeholders = ", ".join("?" for _ in keys)
+                rows = conn.execute(f"SELECT key, value FROM profile WHERE key IN ({placeholders})", keys).fetchall() if keys else []
+            data = {key: json.loads(value) for key, value in rows}
+            for table in self.tables:
+                if fields is None or table in fields:
+                    data[table] = self._select(conn, table)
+        finally:
+            conn.close()
+        return data
+
+    def load_rows(self, username, table, columns=None, limit=None):
+        """
+        Reads only `columns` of `table`, in stored order, as a list of dicts.
+        """
+        columns = columns or self.tables[table]
+        path = self.data_file(username)
+        if not path.endswith(".sqlite"):
+            rows = self._load_json(username).get(table, [])
+            rows = rows if limit is None else rows[:limit]
+            return [{column: row.get(column) for column in columns} for row in rows]
+
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return self._select(conn, table, columns, limit)
+        finally:
+            conn.close()
+
+    def _select(self, conn, table, columns=None, limit=None):
+        columns = columns or self.tables[table]
+        unknown = set(columns) - set(self.tables[table])
+        if unknown:
+            raise ValueError(f"Unknown {table} columns: {', '.join(sorted(unknown))}")
+        query = f"SELECT {', '.join(columns)} FROM {table} ORDER BY rowid"
+        params = ()
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (limit,)
+        return [
+            {column: self._decode(column, value) for column, value in zip(columns, row)}
+            for row in conn.execute(query, params)
+        ]
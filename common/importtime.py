@@ -0,0 +1,36 @@
+import subprocess
+import sys
+
+def profile_imports(module="app", top=25):
+    """
+    Imports `module` in a fresh interpreter under `python -X importtime` and
+    returns the `top` slowest imports as (cumulative_us, self_us, name),
+    slowest first.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    rows.sort(key=lambda row: row[0], reverse=True)
+    return rows[:top]
+
+def format_report(rows):
+    lines = [f"{'cumulative ms':>14} {'self ms':>9}  module"]
+    for cumulative_us, self_us, name in rows:
+        lines.append(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "app"
+    print(format_report(profile_imports(target)))
@@ -0,0 +1,156 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+class Job:
+    """
+    One background pipeline run. `stages` lists the pipeline's stages in
+    order; the pipeline reports progress by calling job.progress(stage) and
+    finished LLM sections through job.add_section(name, text). Every change
+    is also appended to an event log that streaming clients can follow.
+    """
+
+    def __init__(self, platform, username, stages):
+        self.id = uuid.uuid4().hex
+        self.platform = platform
+        self.username = username
+        self.status = "queued"
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.stages = [{"name": name, "status": "pending", "seconds": None} for name in stages]
+        self.sections = []
+        self._stage_started = None
+        self._events = []
+        self._lock = threading.Condition()
+
+    @property
+    def key(self):
+        return (self.platform, self.username.lower())
+
+    def progress(self, stage, status=None, seconds=None):
+        """
+        Sequential pipelines call progress(stage) as each stage starts, which
+        also closes the previous one. Pipelines running stages concurrently
+        report every transition explicitly with `status` and `seconds`.
+        """
+        with self._lock:
+            now = time.time()
+            if status is not None:
+                for entry in self.stages:
+                    if entry["name"] == stage:
+                        entry["status"] = status
+                        entry["seconds"] = round(seconds, 2) if seconds is not None else entry["seconds"]
+                self.status = "running"
+                self._publish("stage", [dict(entry) for entry in self.stages])
+                return
+            for entry in self.stages:
+                if entry["status"] == "running":
+                    entry["status"] = "done"
+                    entry["seconds"] = round(now - self._stage_started, 2)
+            for entry in self.stages:
+                if entry["name"] == stage:
+                    entry["status"] = "running"
+            self._stage_started = now
+            self.status = "running"
+            self._publish("stage", [dict(entry) for entry in self.stages])
+
+    def add_section(self, name, text):
+        with self._lock:
+            section = {"name": name, "text": text}
+            self.sections.append(section)
+            self._publish("section", section)
+
+    def finish(self, error=None):
+        with self._lock:
+            now = time.time()
+            for entry in self.stages:
+                if entry["status"] == "running":
+                    entry["status"] = "failed" if error else "done"
+                    if self._stage_started is not None:
+                        entry["seconds"] = round(now - self._stage_started, 2)
+            self.status = "failed" if error else "done"
+            self.error = error
+            self.finished_at = now
+            self._publish("stage", [dict(entry) for entry in self.stages])
+            self._publish(self.status, {"error": error})
+
+    def _publish(self, kind, data):
+        # Caller holds self._lock
+        self._events.append((kind, data))
+        self._lock.notify_all()
+
+    def wait_events(self, index, timeout=15):
+        """
+        Returns the events after position `index`, waiting up to `timeout`
+        seconds for one to arrive.
+        """
+        with self._lock:
+            self._lock.wait_for(lambda: len(self._events) > index, timeout)
+            return self._events[index:]
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "platform": self.platform,
+                "username": self.username,
+                "status": self.status,
+                "error": self.error,
+                "stages": [dict(entry) for entry in self.stages],
+                "sections": list(self.sections),
+                "elapsed": round((self.finished_at or time.time()) - self.created_at, 2)
+            }
+
+class JobManager:
+    """
+    Runs pipelines on a bounded thread pool. Submitting a platform+username
+    that is already queued or running returns the in-flight job instead of
+    starting a second one.
+    """
+
+    def __init__(self, max_workers=4, retention=3600):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analyze")
+        self._jobs = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, platform, username, pipeline, stages, **options):
+        with self._lock:
+            self._prune()
+            job = Job(platform, username, stages)
+            existing = self._in_flight.get(job.key)
+            if existing is not None:
+                return existing
+            self._jobs[job.id] = job
+            self._in_flight[job.key] = job
+
+        self._executor.submit(self._run, job, pipeline, options)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, pipeline, options):
+        job.status = "running"
+        try:
+            pipeline(job.username, progress=job.progress, on_section=job.add_section, **options)
+        except Exception as e:
+            print(f"❌ Job {job.id} ({job.platform}/{job.username}) failed: {e}")
+            job.finish(error=str(e))
+        else:
+            job.finish()
+        finally:
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,153 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from common.config import load_env
+
+load_env()
+
+# "cohere" for the real API, "local" for the deterministic offline stand-in
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "cohere").lower()
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+# Max generations in flight at once across the process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+# Local stand-in: seconds before the first token, then simulated tokens per second
+LLM_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0.5"))
+LLM_STUB_TOKENS_PER_SECOND = float(os.getenv("LLM_STUB_TOKENS_PER_SECOND", "50"))
+
+class LLMProvider:
+    """
+    Interface for text generation backends. generate() returns the whole
+    completion, generate_stream() yields it in chunks.
+    """
+
+    name = "base"
+
+    def generate(self, model, prompt, temperature, max_tokens, seed=None):
+        return "".join(self.generate_stream(model, prompt, temperature, max_tokens, seed))
+
+    def generate_stream(self, model, prompt, temperature, max_tokens, seed=None):
+        raise NotImplementedError
+
+class CohereProvider(LLMProvider):
+    name = "cohere"
+
+    def __init__(self, api_key=None, timeout=LLM_TIMEOUT):
+        self.api_key = api_key or os.getenv("COHERE_API_KEY")
+        self.timeout = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Built on first use so importing the pipelines doesn't need the SDK or a key
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import cohere
+                    self._client = cohere.Client(self.api_key, timeout=self.timeout)
+        return self._client
+
+    def _options(self, temperature, max_tokens, seed):
+        options = {"temperature": temperature, "max_tokens": max_tokens}
+        if seed is not None:
+            options["seed"] = seed
+        return options
+
+    def generate(self, model, prompt, temperature, max_tokens, seed=None):
+        response = self.client.generate(model=model, prompt=prompt, **self._options(temperature, max_tokens, seed))
+        return response.generations[0].text
+
+    def generate_stream(self, model, prompt, temperature, max_tokens, seed=None):
+        events = self.client.generate_stream(model=model, prompt=prompt, **self._options(temperature, max_tokens, seed))
+        for event in events:
+            if getattr(event, "event_type", None) == "text-generation" and event.text:
+                yield event.text
+
+class LocalStubProvider(LLMProvider):
+    """
+    Offline stand-in for load testing. Produces a deterministic completion
+    with the sections the prompt asks for, paced by a first-token latency and
+    a token rate so pipelines behave like they would against a live API.
+    """
+
+    name = "local"
+
+    def __init__(self, latency=LLM_STUB_LATENCY, tokens_per_second=LLM_STUB_TOKENS_PER_SECOND, timeout=LLM_TIMEOUT):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.timeout = timeout
+
+    def completion_for(self, prompt, max_tokens):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        markdown_sections = re.findall(r"^#+\s*(.+?)\s*$", prompt, re.MULTILINE)
+        listed_sections = re.findall(r"^-\s*([A-Z][A-Za-z ]+?)\s*\(", prompt, re.MULTILINE)
+
+        lines = []
+        for i, section in enumerate(markdown_sections or listed_sections):
+            body = f"Simulated {section.lower()} ({digest[i % 32:i % 32 + 8]})."
+            if markdown_sections:
+                lines += [f"## {section}", body, ""]
+            else:
+                lines += [f"{section}: {body}", ""]
+        if not lines:
+            lines = [f"Simulated completion {digest[:16]}."]
+
+        words = "\n".join(lines).split(" ")
+        return " ".join(words[:max_tokens])
+
+    def generate_stream(self, model, prompt, temperature, max_tokens, seed=None):
+        text = self.completion_for(prompt, max_tokens)
+        chunks = [word + " " for word in text.split(" ")]
+        if self.tokens_per_second > 0 and self.latency + len(chunks) / self.tokens_per_second > self.timeout:
+            raise TimeoutError(f"Simulated generation would exceed the {self.timeout}s timeout")
+
+        time.sleep(self.latency)
+        for chunk in chunks:
+            if self.tokens_per_second > 0:
+                time.sleep(1 / self.tokens_per_second)
+            yield chunk
+
+class BoundedProvider(LLMProvider):
+    """
+    Wraps a provider so at most `max_concurrency` generations (streamed or
+    not) run at the same time.
+    """
+
+    def __init__(self, provider, max_concurrency=LLM_MAX_CONCURRENCY):
+        self.provider = provider
+        self.name = provider.name
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+
+    def generate(self, model, prompt, temperature, max_tokens, seed=None):
+        with self._slots:
+            return self.provider.generate(model, prompt, temperature, max_tokens, seed)
+
+    def generate_stream(self, model, prompt, temperature, max_tokens, seed=None):
+        with self._slots:
+            yield from self.provider.generate_stream(model, prompt, temperature, max_tokens, seed)
+
+PROVIDERS = {
+    "cohere": CohereProvider,
+    "local": LocalStubProvider,
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                if LLM_PROVIDER not in PROVIDERS:
+                    raise ValueError(f"Unknown LLM_PROVIDER '{LLM_PROVIDER}', expected one of {', '.join(PROVIDERS)}")
+                _provider = BoundedProvider(PROVIDERS[LLM_PROVIDER]())
+    return _provider
+
+def set_provider(provider, max_concurrency=LLM_MAX_CONCURRENCY):
+    # For benchmarks and scripts that pick a backend at runtime
+    global _provider
+    with _provider_lock:
+        _provider = BoundedProvider(provider, max_concurrency)
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from common.config import load_env
+from common.llm import get_provider
+
+load_env()
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite")
+# Set LLM_CACHE=0 to always call the model
+CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+# Pin temperature 0 and a fixed seed so a cached completion is what a fresh call would return
+DETERMINISTIC = os.getenv("LLM_DETERMINISTIC", "0") == "1"
+DETERMINISTIC_SEED = int(os.getenv("LLM_SEED", "42"))
+
+class GenerationCancelled(Exception):
+    pass
+
+def cache_key(model, prompt, temperature, max_tokens, seed=None, provider="cohere"):
+    payload = json.dumps(
+        {"provider": provider, "model": model, "prompt": prompt,
+         "temperature": temperature, "max_tokens": max_tokens, "seed": seed},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    """
+    Persistent prompt -> completion store keyed by a hash of the generation
+    settings, with TTL expiry, least-recently-used eviction past
+    `max_entries` and in-process hit/miss counters.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=TTL_SECONDS, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    completion TEXT,
+                    created_at REAL,
+                    accessed_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_accessed ON completions(accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT completion, created_at FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, model, completion):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?)",
+                (key, model, completion, now, now)
+            )
+            conn.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl,))
+            conn.execute("""
+                DELETE FROM completions WHERE key IN (
+                    SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": entries
+            }
+
+llm_cache = LLMCache() if CACHE_ENABLED else None
+
+def generation_options(temperature):
+    if DETERMINISTIC:
+        return {"temperature": 0.0, "seed": DETERMINISTIC_SEED}
+    return {"temperature": temperature, "seed": None}
+
+def cached_generate(model, prompt, temperature, max_tokens, provider=None, force=False):
+    """
+    Generates with the configured LLM provider and returns the stripped
+    completion text, served from the persistent cache when the same
+    (provider, model, prompt, temperature, max_tokens) was generated before.
+    `force` skips the lookup; the fresh completion still replaces the cached one.
+    """
+    provider = provider or get_provider()
+    options = generation_options(temperature)
+    key = cache_key(model, prompt, options["temperature"], max_tokens, options["seed"], provider.name)
+    if llm_cache is not None and not force:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            print("⚡ Using cached LLM response")
+            return cached
+
+    text = provider.generate(model, prompt, options["temperature"], max_tokens, options["seed"]).strip()
+
+    # Empty completions are treated as failures by the callers, so don't pin them
+    if llm_cache is not None and text:
+        llm_cache.put(key, model, text)
+    return text
+
+def cached_generate_stream(model, prompt, temperature, max_tokens, on_text, provider=None, cancelled=None, force=False):
+    """
+    Streaming variant of cached_generate: `on_text(chunk)` is called for every
+    token chunk as it arrives (or once with the whole cached completion) and
+    the full stripped text is returned at the end. Setting the `cancelled`
+    event stops reading the stream and raises GenerationCancelled.
+    """
+    provider = provider or get_provider()
+    options = generation_options(temperature)
+    key = cache_key(model, prompt, options["temperature"], max_tokens, options["seed"], provider.name)
+    if llm_cache is not None and not force:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            print("⚡ Using cached LLM response")
+            on_text(cached)
+            return cached
+
+    chunks = []
+    stream = provider.generate_stream(model, prompt, options["temperature"], max_tokens, options["seed"])
+    try:
+        for chunk in stream:
+            if cancelled is not None and cancelled.is_set():
+                raise GenerationCancelled("Generation cancelled")
+            chunks.append(chunk)
+            on_text(chunk)
+    finally:
+        # Closing the stream releases the provider's concurrency slot
+        stream.close()
+    text = "".join(chunks).strip()
+
+    if llm_cache is not None and text:
+        llm_cache.put(key, model, text)
+    return text
@@ -0,0 +1,80 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are added per second up to
+    `capacity`; acquire() blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self, seconds):
+        # Push the bucket into debt so every caller backs off for `seconds`
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+class RateLimitWindow:
+    """
+    Latest remaining-calls / reset-time pair reported by an API, per
+    resource, shared by every thread. Below `low_remaining` calls, the rest
+    are spread evenly until the window resets, at most `max_delay` seconds
+    apart; an exhausted window waits for its reset.
+    """
+
+    def __init__(self, low_remaining, max_delay):
+        self.low_remaining = low_remaining
+        self.max_delay = max_delay
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def update(self, remaining, reset, resource=None):
+        with self._lock:
+            self._limits[resource] = (int(remaining), float(reset))
+
+    def _get(self, resource):
+        with self._lock:
+            return self._limits.get(resource, (None, None))
+
+    def exhausted(self, resource=None):
+        remaining, reset = self._get(resource)
+        return remaining is not None and remaining <= 0 and reset > time.time()
+
+    def delay(self, resource=None):
+        """
+        Seconds to wait before the next call to `resource`.
+        """
+        remaining, reset = self._get(resource)
+        if remaining is None:
+            return 0
+        window_left = reset - time.time()
+        if window_left <= 0:
+            return 0
+        if remaining <= 0:
+            return window_left
+        if remaining < self.low_remaining:
+            return min(window_left / remaining, self.max_delay)
+        return 0
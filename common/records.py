@@ -0,0 +1,56 @@
+class Record:
+    """
+    Base for the small in-memory objects handed between pipeline stages.
+    Subclasses list their fields in __slots__; keys a subclass doesn't know
+    about are kept in `extra` so converting back to a dict loses nothing.
+    """
+
+    __slots__ = ("extra",)
+
+    def __init__(self, **fields):
+        for name in self._fields():
+            if name in fields:
+                setattr(self, name, fields.pop(name))
+        self.extra = fields
+
+    def __getattr__(self, name):
+        # Only reached for fields the record was built without; they read as None
+        if name != "extra" and name in self._fields():
+            return None
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    @classmethod
+    def _fields(cls):
+        names = []
+        for klass in reversed(cls.__mro__):
+            names += [name for name in getattr(klass, "__slots__", ()) if name != "extra"]
+        return names
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self._fields()}
+        data.update(self.extra)
+        return data
+
+    def get(self, name, default=None):
+        # Same as dict.get on the source dict, so stages can take either a record or a loaded dict
+        if name not in self._fields():
+            return self.extra.get(name, default)
+        try:
+            return object.__getattribute__(self, name)
+        except AttributeError:
+            return default
+
+    def __repr__(self):
+        return f"{type(self).__name__}(username={getattr(self, 'username', None)!r})"
+
+class PersonaResult(Record):
+    """
+    What one pipeline run produced: the dataset it worked from, the persona
+    script text and where the artifacts were written.
+    """
+
+    __slots__ = ("platform", "username", "dataset", "script", "script_path", "image_path", "reused")
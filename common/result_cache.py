@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from common.atomic import atomic_write_json
+
+class ResultCache:
+    """
+    Freshness policy for one platform's generated personas. A manifest per
+    user records when the artifacts were produced and a fingerprint of the
+    scraped data they were produced from, so a pipeline can skip work when
+    the result is recent or the input has not changed.
+    """
+
+    def __init__(self, platform, data_path, artifacts, manifest_dir, max_age, max_bytes):
+        self.platform = platform
+        self.data_path = data_path
+        self.artifacts = artifacts
+        self.manifest_dir = manifest_dir
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def manifest_path(self, username):
+        return os.path.join(self.manifest_dir, f"{username}.json")
+
+    def artifact_paths(self, username):
+        return [path.format(username=username) for path in self.artifacts]
+
+    def load_manifest(self, username):
+        try:
+            with open(self.manifest_path(username), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def data_file(self, username):
+        # `data_path` is a path template or a callable returning the user's data file
+        if callable(self.data_path):
+            return self.data_path(username)
+        return self.data_path.format(username=username)
+
+    def fingerprint(self, username):
+        path = self.data_file(username)
+        if not os.path.exists(path):
+            return None
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def has_artifacts(self, username):
+        return all(os.path.exists(path) for path in self.artifact_paths(username))
+
+    def is_fresh(self, username):
+        # Recent enough to serve without scraping at all
+        manifest = self.load_manifest(username)
+        if manifest is None or not self.has_artifacts(username):
+            return False
+        return time.time() - manifest["generated_at"] < self.max_age
+
+    def is_unchanged(self, username):
+        # Freshly scraped data matches what the current artifacts were built from
+        manifest = self.load_manifest(username)
+        if manifest is None or not self.has_artifacts(username):
+            return False
+        return manifest.get("data_fingerprint") == self.fingerprint(username)
+
+    def record(self, username, since=None):
+        """
+        Marks the user's artifacts as current for the scraped data on disk.
+        With `since`, nothing is recorded unless every artifact was rewritten
+        after that time (a failed stage leaves the old files behind).
+        """
+        paths = self.artifact_paths(username)
+        if not all(os.path.exists(path) for path in paths):
+            return False
+        if since is not None and any(os.path.getmtime(path) < since for path in paths):
+            return False
+
+        now = time.time()
+        atomic_write_json(self.manifest_path(username), {
+            "platform": self.platform,
+            "username": username,
+            "data_fingerprint": self.fingerprint(username),
+            "generated_at": now,
+            "accessed_at": now
+        })
+        self.evict(keep=username)
+        return True
+
+    def touch(self, username):
+        manifest = self.load_manifest(username)
+        if manifest is not None:
+            manifest["accessed_at"] = time.time()
+            atomic_write_json(self.manifest_path(username), manifest)
+
+    def evict(self, keep=None):
+        """
+        Deletes the least recently accessed users' artifacts until the total
+        size of all cached artifacts is within max_bytes.
+        """
+        if not os.path.isdir(self.manifest_dir):
+            return
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.manifest_dir):
+                if not name.endswith(".json"):
+                    continue
+                username = name[:-len(".json")]
+                manifest = self.load_manifest(username) or {}
+                size = sum(os.path.getsize(p) for p in self.artifact_paths(username) if os.path.exists(p))
+                entries.append((manifest.get("accessed_at", 0), username, size))
+                total += size
+
+            for _, username, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if username == keep:
+                    continue
+                for path in self.artifact_paths(username):
+                    if os.path.exists(path):
+                        os.remove(path)
+                os.remove(self.manifest_path(username))
+                total -= size
+                print(f"🧹 Evicted cached {self.platform} persona for {username}")
@@ -0,0 +1,86 @@
+import os
+from common.config import load_env
+from common.llm_cache import cached_generate, cached_generate_stream
+
+load_env()
+
+# Stream completions and report each section as soon as it is complete
+STREAMING = os.getenv("LLM_STREAMING", "1") != "0"
+
+class SectionStream:
+    """
+    Splits streamed LLM text into sections as it arrives. `match_header(line)`
+    returns (section, rest_of_line) for a header line, (None, "") for a header
+    that isn't tracked, or None for body text. Each section is handed to
+    `on_section(name, text)` as soon as the next header shows it is complete.
+    """
+
+    def __init__(self, match_header, on_section):
+        self.match_header = match_header
+        self.on_section = on_section
+        self._buffer = ""
+        self._current = None
+        self._lines = []
+
+    def feed(self, text):
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            self._line(line)
+
+    def close(self):
+        if self._buffer:
+            self._line(self._buffer)
+            self._buffer = ""
+        self._emit()
+
+    def _line(self, line):
+        header = self.match_header(line)
+        if header is None:
+            if self._current is not None:
+                self._lines.append(line)
+            return
+        self._emit()
+        name, rest = header
+        self._current = name
+        self._lines = [rest] if rest else []
+
+    def _emit(self):
+        if self._current is not None:
+            self.on_section(self._current, "\n".join(self._lines).strip())
+        self._current = None
+        self._lines = []
+
+def generate_sections(model, prompt, temperature, max_tokens, match_header, on_section=None,
+                      fixed=None, cancelled=None, force=False):
+    """
+    Generates `prompt` through the LLM cache and returns the completion
+    text. With `on_section` (and LLM_STREAMING on) the completion is
+    streamed and each section is handed out while the rest is still
+    generating. `fixed` maps sections whose text is known up front (e.g.
+    the username) to that text; they are handed out first and override
+    whatever the model writes for them. `force` bypasses the LLM cache.
+    """
+    if on_section is None or not STREAMING:
+        return cached_generate(model=model, prompt=prompt, temperature=temperature, max_tokens=max_tokens, force=force)
+
+    fixed = fixed or {}
+    for name, text in fixed.items():
+        on_section(name, text)
+
+    def emit(name, text):
+        if name not in fixed:
+            on_section(name, text)
+
+    stream = SectionStream(match_header, emit)
+    text = cached_generate_stream(
+        model=model,
+        prompt=prompt,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        on_text=stream.feed,
+        cancelled=cancelled,
+        force=force
+    )
+    stream.close()
+    return text
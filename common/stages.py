@@ -0,0 +1,138 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class StopPipeline(Exception):
+    """
+    Raised by a stage to finish the run early: the stage counts as done and
+    every stage that hasn't started yet is skipped.
+    """
+
+class StageTimeout(Exception):
+    pass
+
+class Stage:
+    __slots__ = ("name", "fn", "deps", "timeout")
+
+    def __init__(self, name, fn, deps=(), timeout=None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.timeout = timeout
+
+class StageGraph:
+    """
+    Runs pipeline stages on a thread pool as soon as the stages they depend
+    on have finished, so independent stages overlap. Each stage function is
+    called with a dict of its dependencies' return values. A stage that
+    fails or times out skips everything downstream of it; independent
+    stages still run, and the first error is raised once the graph settles.
+
+    A timed-out stage's thread can't be killed; it is abandoned, its result
+    ignored and `cancelled` set, so stage functions should check it before
+    writing anything the next run of the same pipeline would also write.
+    """
+
+    def __init__(self, max_workers=4, on_stage=None):
+        self.max_workers = max_workers
+        # on_stage(name, status, seconds) for "running", "done", "failed" and "skipped"
+        self.on_stage = on_stage or (lambda name, status, seconds: None)
+        self.stages = {}
+        self.results = {}
+        self.status = {}
+        self.timings = {}
+        # Set once a stage is abandoned; the run may return while its thread still works
+        self.cancelled = threading.Event()
+
+    def add(self, name, fn, deps=(), timeout=None):
+        missing = [dep for dep in deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {', '.join(missing)}")
+        self.stages[name] = Stage(name, fn, deps, timeout)
+        self.status[name] = "pending"
+        return self
+
+    def _set(self, name, status, seconds=None):
+        self.status[name] = status
+        if seconds is not None:
+            self.timings[name] = round(seconds, 3)
+        self.on_stage(name, status, self.timings.get(name))
+
+    def _skip_downstream(self, failed):
+        for stage in self.stages.values():
+            if self.status[stage.name] == "pending" and any(
+                dep == failed or self.status[dep] == "skipped" for dep in stage.deps
+            ):
+                self._set(stage.name, "skipped")
+                self._skip_downstream(stage.name)
+
+    def _ready(self):
+        return [
+            stage for stage in self.stages.values()
+            if self.status[stage.name] == "pending"
+            and all(self.status[dep] == "done" for dep in stage.deps)
+        ]
+
+    def run(self):
+        """
+        Runs every stage and returns {stage name: return value}.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage")
+        running = {}
+        error = None
+        stopped = False
+        lock = threading.Lock()
+
+        try:
+            while True:
+                if not stopped:
+                    for stage in self._ready():
+                        self._set(stage.name, "running")
+                        inputs = {dep: self.results.get(dep) for dep in stage.deps}
+                        started = time.monotonic()
+                        deadline = started + stage.timeout if stage.timeout else None
+                        running[executor.submit(stage.fn, inputs)] = (stage, started, deadline)
+                if not running:
+                    break
+
+                deadlines = [deadline for _, _, deadline in running.values() if deadline is not None]
+                wait_for = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+                finished, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                now = time.monotonic()
+                for future in list(running):
+                    stage, started, deadline = running[future]
+                    if future in finished:
+                        del running[future]
+                        try:
+                            with lock:
+                                self.results[stage.name] = future.result()
+                            self._set(stage.name, "done", now - started)
+                        except StopPipeline:
+                            self._set(stage.name, "done", now - started)
+                            stopped = True
+                        except Exception as e:
+                            self._set(stage.name, "failed", now - started)
+                            error = error or e
+                            self._skip_downstream(stage.name)
+                    elif deadline is not None and now >= deadline:
+                        del running[future]
+                        self.cancelled.set()
+                        self._set(stage.name, "failed", now - started)
+                        error = error or StageTimeout(f"Stage '{stage.name}' timed out after {stage.timeout}s")
+                        self._skip_downstream(stage.name)
+
+            if stopped:
+                for name, status in self.status.items():
+                    if status == "pending":
+                        self._set(name, "skipped")
+        finally:
+            # Don't block on abandoned (timed-out) stages
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if error is not None:
+            raise error
+        return self.results
+
+    def summary(self):
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items())